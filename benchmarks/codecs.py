@@ -0,0 +1,48 @@
+"""Write throughput and file size of each recording codec available to OpenCV.
+
+Usage: python -m benchmarks.codecs recordings/sample.avi --count 200 --fps 20
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import load_frames, summarize
+from core.codecs import CODECS, open_writer, probe_codec
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('frames', help="video file or directory of images")
+    parser.add_argument('--count', type=int, default=200, help="number of frames to use")
+    parser.add_argument('--fps', type=float, default=20, help="recording frame rate")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames, args.count)
+    size = (frames[0].shape[1], frames[0].shape[0])
+    print(f"{len(frames)} frames, {size[0]}x{size[1]} @ {args.fps} fps")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for codec in CODECS:
+            if not probe_codec(codec, args.fps):
+                print(f"{codec:<24} unavailable")
+                continue
+
+            writer, filename = open_writer(os.path.join(directory, codec), codec, args.fps, size)
+            timings = []
+            cpu_start = time.process_time()
+            for frame in frames:
+                start = time.perf_counter()
+                writer.write(frame)
+                timings.append(time.perf_counter() - start)
+            writer.release()
+            cpu = time.process_time() - cpu_start
+
+            # Size of one minute of video at this frame rate
+            mb_per_minute = os.path.getsize(filename) / len(frames) * args.fps * 60 / 1e6
+            print(f"{summarize(codec, timings)}  {len(frames) / sum(timings):7.1f} fps  "
+                  f"cpu={cpu / len(frames) * 1000:6.2f} ms/frame  {mb_per_minute:7.1f} MB/min")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import glob
+import os
+import statistics
+
+import cv2
+
+
+def load_frames(path, count=50):
+    """Read up to count frames from a video file or a directory of images"""
+    frames = []
+    if os.path.isdir(path):
+        for filename in sorted(glob.glob(os.path.join(path, '*'))):
+            frame = cv2.imread(filename)
+            if frame is not None:
+                frames.append(frame)
+            if len(frames) >= count:
+                break
+    else:
+        cap = cv2.VideoCapture(path)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                break
+            frames.append(frame)
+        cap.release()
+
+    if not frames:
+        raise SystemExit(f"No frames could be read from {path}")
+    return frames
+
+
+def summarize(name, timings):
+    """One result line with mean/median/p95 in milliseconds"""
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return (f"{name:<24} n={len(ms):<5} mean={statistics.mean(ms):8.2f} ms  "
+            f"median={statistics.median(ms):8.2f} ms  p95={p95:8.2f} ms")
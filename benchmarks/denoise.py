@@ -0,0 +1,79 @@
+"""Latency and OCR accuracy of each denoise method on a labelled sample set.
+
+The sample directory holds images with a .txt file of the same name
+containing the expected text (e.g. frame_001.png + frame_001.txt). Images
+are processed in name order so the temporal denoiser sees consecutive
+frames. Accuracy is 1 - edit distance / expected length, per character.
+
+Usage: python -m benchmarks.denoise samples/ --config config.yaml
+"""
+import argparse
+import glob
+import os
+import time
+
+import cv2
+
+from benchmarks.common import summarize
+from core.alarm import edit_distance
+from core.config import Config
+from core.ocr_backends import create_backend
+from core.preprocessing import PreprocessingPipeline
+
+METHODS = ['none', 'median', 'gaussian', 'bilateral', 'nlm', 'nlm_reduced', 'temporal']
+
+
+def load_samples(directory):
+    samples = []
+    for filename in sorted(glob.glob(os.path.join(directory, '*'))):
+        base, ext = os.path.splitext(filename)
+        if ext.lower() == '.txt' or not os.path.exists(base + '.txt'):
+            continue
+        image = cv2.imread(filename)
+        if image is None:
+            continue
+        with open(base + '.txt', 'r', encoding='utf-8') as f:
+            samples.append((image, f.read().strip()))
+    if not samples:
+        raise SystemExit(f"No labelled images found in {directory}")
+    return samples
+
+
+def accuracy(text, expected):
+    text, expected = ' '.join(text.split()), ' '.join(expected.split())
+    if not expected:
+        return 1.0 if not text else 0.0
+    return max(0.0, 1.0 - edit_distance(text, expected) / len(expected))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('samples', help="directory of images with expected-text .txt files")
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--methods', nargs='*', default=METHODS, help="denoise methods to compare")
+    args = parser.parse_args()
+
+    config = Config(args.config)
+    backend = create_backend(config)
+    samples = load_samples(args.samples)
+    print(f"{len(samples)} samples, OCR backend {backend.name}")
+
+    for method in args.methods:
+        settings = dict(config.config['ocr']['preprocessing'], enabled=True,
+                        denoise=method != 'none', denoise_method=method)
+        pipeline = PreprocessingPipeline(settings)
+
+        timings, scores = [], []
+        for image, expected in samples:
+            start = time.perf_counter()
+            processed = pipeline.run(image, source='benchmark')
+            timings.append(time.perf_counter() - start)
+            scores.append(accuracy(backend.image_to_string(processed), expected))
+
+        stages = pipeline.stats()
+        print(f"{summarize(method, timings)}  denoise={stages.get('denoise', 0.0):8.2f} ms  "
+              f"accuracy={sum(scores) / len(scores):6.1%}")
+
+
+if __name__ == '__main__':
+    main()
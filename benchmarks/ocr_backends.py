@@ -0,0 +1,47 @@
+"""Per-frame OCR latency of each available backend on a fixed set of frames.
+
+Usage: python -m benchmarks.ocr_backends recordings/sample.avi --count 50
+"""
+import argparse
+import time
+
+from benchmarks.common import load_frames, summarize
+from core.config import Config
+from core.ocr_backends import BACKENDS, create_backend
+from core.preprocessing import ImagePreprocessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('frames', help="video file or directory of images")
+    parser.add_argument('--count', type=int, default=50, help="number of frames to use")
+    parser.add_argument('--config', default='config.yaml')
+    args = parser.parse_args()
+
+    config = Config(args.config)
+    # The pipeline reuses its output buffer, keep a copy of every frame
+    frames = [ImagePreprocessor.preprocess_image(frame, config).copy()
+              for frame in load_frames(args.frames, args.count)]
+    print(f"{len(frames)} frames, {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    for name in BACKENDS:
+        backend = create_backend(config, name)
+        if backend.name != name:
+            print(f"{name:<24} unavailable")
+            continue
+
+        # Warm-up call so one-time language loading is reported separately
+        start = time.perf_counter()
+        backend.image_to_string(frames[0])
+        warmup = time.perf_counter() - start
+
+        timings = []
+        for frame in frames:
+            start = time.perf_counter()
+            backend.image_to_string(frame)
+            timings.append(time.perf_counter() - start)
+        print(f"{summarize(name, timings)}  first={warmup * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
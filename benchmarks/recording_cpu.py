@@ -0,0 +1,97 @@
+"""CPU time per recorded frame: XVID re-encode vs JPEG segments vs MJPEG passthrough.
+
+The input frames are JPEG encoded first to stand in for an MJPEG camera.
+Each path then does what the recorder does per frame:
+
+  xvid         decode JPEG + VideoWriter(XVID).write   (VideoRecorder)
+  segments     decode JPEG + cv2.imencode + file write  (SegmentRecorder.add_frame)
+  passthrough  file write + 1/8 grayscale decode for the change gate, full
+               decode of every Nth frame (SegmentRecorder.add_encoded)
+
+--decode-every is the share of frames the change gate passes to OCR; the
+default 1 is the worst case (every frame changes). Static scenes get
+close to the passthrough cost with a large N.
+
+Usage: python -m benchmarks.recording_cpu recordings/sample.avi --count 200 --decode-every 1
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.common import load_frames, summarize
+
+
+def run_xvid(packets, size, fps, directory):
+    writer = cv2.VideoWriter(os.path.join(directory, 'bench.avi'),
+                             cv2.VideoWriter_fourcc(*'XVID'), fps, size)
+    timings = []
+    for packet in packets:
+        start = time.process_time()
+        writer.write(cv2.imdecode(np.frombuffer(packet, dtype=np.uint8), cv2.IMREAD_COLOR))
+        timings.append(time.process_time() - start)
+    writer.release()
+    return timings
+
+
+def run_segments(packets, size, fps, directory):
+    params = [int(cv2.IMWRITE_JPEG_QUALITY), 85]
+    timings = []
+    with open(os.path.join(directory, 'bench_segments.mjpeg'), 'wb') as f:
+        for packet in packets:
+            start = time.process_time()
+            frame = cv2.imdecode(np.frombuffer(packet, dtype=np.uint8), cv2.IMREAD_COLOR)
+            ok, data = cv2.imencode('.jpg', frame, params)
+            f.write(data.tobytes())
+            timings.append(time.process_time() - start)
+    return timings
+
+
+def run_passthrough(packets, size, fps, directory, decode_every=1):
+    timings = []
+    with open(os.path.join(directory, 'bench_passthrough.mjpeg'), 'wb') as f:
+        for i, packet in enumerate(packets):
+            start = time.process_time()
+            f.write(packet)
+            # Like CameraPipeline: reduced decode for the gate, full decode for OCR
+            data = np.frombuffer(packet, dtype=np.uint8)
+            cv2.imdecode(data, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+            if decode_every and i % decode_every == 0:
+                cv2.imdecode(data, cv2.IMREAD_COLOR)
+            timings.append(time.process_time() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('frames', help="video file or directory of images")
+    parser.add_argument('--count', type=int, default=200, help="number of frames to use")
+    parser.add_argument('--fps', type=float, default=20, help="stream rate for the per-stream CPU estimate")
+    parser.add_argument('--decode-every', type=int, default=1,
+                        help="passthrough: fully decode every Nth frame for OCR (0 = never)")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames, args.count)
+    size = (frames[0].shape[1], frames[0].shape[0])
+    packets = [cv2.imencode('.jpg', frame)[1].tobytes() for frame in frames]
+    print(f"{len(packets)} frames, {size[0]}x{size[1]}, "
+          f"{sum(map(len, packets)) / len(packets) / 1024:.0f} KB/frame as JPEG")
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [
+            ('xvid', run_xvid(packets, size, args.fps, directory)),
+            ('segments', run_segments(packets, size, args.fps, directory)),
+            (f'passthrough (1/{args.decode_every})',
+             run_passthrough(packets, size, args.fps, directory, args.decode_every))
+        ]
+
+    for name, timings in results:
+        per_frame = sum(timings) / len(timings)
+        print(f"{summarize(name, timings)}  ~{per_frame * args.fps * 100:5.1f}% of a core per stream")
+
+
+if __name__ == '__main__':
+    main()
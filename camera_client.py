@@ -3,277 +3,95 @@
 # Author: @Hakan KILIÇASLAN - 2025
 # License: MIT
 
-import cv2
-import numpy as np
+import sys
+
+if __name__ == "__main__" and "--headless" in sys.argv[1:]:
+    # Headless mode runs without importing tkinter/ImageTk at all
+    from headless import main
+    sys.exit(main())
+
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
-import pytesseract
-import threading
+import queue
+import time
 import logging
 from datetime import datetime
-import os
-import time
-import yaml
 from tkinter import filedialog
 import json
-from collections import deque
-from threading import Lock
 from ui.shortcuts import ShortcutManager
 from ui.help import HelpWindow
 from ui.theme import ThemeManager
+from ui.renderer import DisplayRenderer, StreamView, get_renderer
+from core.capture import FrameSource, CameraConnectionError
+from core.config import Config
+from core.detections import DetectionStore, OCRDetection, to_monotonic
+from core.history import HistoryStore
+from core.ocr import OCREngine, FrameChangeGate
+from core.roi import get_rois, set_rois, TextRegionDetector
+from core.recorder import VideoRecorder
+from core.alarm import AlarmDispatcher, read_alarm_words
+from core.logs import setup_logging, log_count
+from core.textlog import get_text_writer, save_detected_text
+from core.manager import CameraManager
 
 global tested_urls, ocr_text_buffer
 global ocr_text_alarm_words
 global save_ocr_text
 global video_recorder
+global ocr_engine
+global camera_manager
+global active_stream
 tested_urls = []
-ocr_text_buffer = [] # max buffer size = 100
 ocr_text_alarm_words = []
 save_ocr_text = False
 video_recorder = None
-
-class Config:
-    def __init__(self):
-        self.config = {}
-        self.config_file = "config.yaml"
-        self.load_config()
-    
-    def load_config(self):
-        try:
-            with open(self.config_file, 'r') as f:
-                self.config = yaml.safe_load(f)
-            logging.info(f"Configuration loaded from {self.config_file}")
-        except FileNotFoundError:
-            logging.warning(f"Configuration file {self.config_file} not found, using defaults")
-            self.create_default_config()
-    
-    def save_config(self):
-        try:
-            with open(self.config_file, 'w') as f:
-                yaml.dump(self.config, f, default_flow_style=False)
-            logging.info(f"Configuration saved to {self.config_file}")
-        except Exception as e:
-            logging.error(f"Failed to save configuration: {str(e)}")
-    
-    def create_default_config(self):
-        self.config = {
-            'camera': {
-                'default_url': 'http://localhost:8080/video_feed',
-                'frame_width': 640,
-                'frame_height': 480,
-                'connection_timeout': 10
-            },
-            'ocr': {
-                'buffer_size': 100,
-                'save_detected_text': False,
-                'text_save_directory': 'detected_texts',
-                'tesseract_path': '/usr/local/bin/tesseract',
-                'preprocessing': {
-                    'enabled': False,
-                    'resize_width': 640,
-                    'denoise': True,
-                    'threshold_method': 'adaptive',
-                    'contrast_enhance': True,
-                    'deskew': True
-                }
-            },
-            'alarm': {
-                'default_words': ["599:", "home theater", "smoke", "danger", "alert", "warning", "hazard", "emergency"],
-                'words_file': 'alarm_words.txt'
-            },
-            'logging': {
-                'level': 'INFO',
-                'directory': 'logs',
-                'format': '%(asctime)s - %(levelname)s - %(message)s'
-            },
-            'recording': {
-                'enabled': False,
-                'output_directory': 'recordings',
-                'format': 'XVID',
-                'fps': 20,
-                'resolution': {
-                    'width': 640,
-                    'height': 480
-                },
-                'pre_alarm_duration': 5,
-                'post_alarm_duration': 10
-            }
-        }
-        self.save_config()
+ocr_engine = None
+camera_manager = None
+active_stream = None  # GUI'de gösterilen akış (StreamView)
 
 # Global config instance
 config = Config()
 
-# Log yapılandırması
-def setup_logging():
-    log_dir = config.config['logging']['directory']
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    
-    log_file = os.path.join(log_dir, f"camera_client_{datetime.now().strftime('%Y%m%d')}.log")
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
-    logging.info("Logging system initialized")
-
-def save_detected_text(text, detected_time=None):
-    """OCR ile tespit edilen metni dosyaya kaydet"""
+# Alarmlar her OCR sonucunda değerlendirilir ve abonelere kuyruk ile iletilir
+alarm_dispatcher = AlarmDispatcher(config)
+
+def get_ocr_engine():
+    """Uygulama genelinde paylaşılan OCR motoru"""
+    global ocr_engine
+    if ocr_engine is None:
+        ocr_engine = OCREngine(config)
+    return ocr_engine
+
+def update_alarm_words(words):
+    """Alarm kelimelerini ayarla ve eşleştiriciyi bir kez yeniden derle"""
+    global ocr_text_alarm_words
+    ocr_text_alarm_words = list(words)
+    # Kamera yöneticisi de aynı dispatcher'ı kullanır
+    alarm_dispatcher.set_words(ocr_text_alarm_words)
+
+def handle_ocr_result(text, captured_at, camera_id=None):
+    """OCR worker'dan gelen sonucu buffer'a ekle (worker thread'inde çalışır)"""
     if not text.strip():
         return
-        
-    save_dir = config.config['ocr']['text_save_directory']
-    if not os.path.exists(save_dir):
-        os.makedirs(save_dir)
-        
-    filename = os.path.join(save_dir, f"ocr_text_{datetime.now().strftime('%Y%m%d')}.txt")
-    timestamp = detected_time or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    with open(filename, 'a', encoding='utf-8') as f:
-        f.write(f"[{timestamp}] {text.strip()}\n")
-    logging.info(f"Detected text saved to {filename}")
-
-class OCRDetection:
-    def __init__(self, text, timestamp=None):
-        self.text = text.strip()
-        self.timestamp = timestamp or datetime.now()
-    
-    def __str__(self):
-        return f"[{self.timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}] {self.text}"
-
-# OCR buffer'ı güncelleme
-ocr_text_buffer = []  # Artık OCRDetection nesnelerini saklayacak
-
-class ImagePreprocessor:
-    @staticmethod
-    def preprocess_image(image, config):
-        if not config.config['ocr']['preprocessing']['enabled']:
-            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-        # Resize
-        width = config.config['ocr']['preprocessing']['resize_width']
-        height = int(width * image.shape[0] / image.shape[1])
-        image = cv2.resize(image, (width, height))
-
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-        # Denoise
-        if config.config['ocr']['preprocessing']['denoise']:
-            gray = cv2.fastNlMeansDenoising(gray)
-
-        # Threshold
-        method = config.config['ocr']['preprocessing']['threshold_method']
-        if method == 'simple':
-            _, gray = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
-        elif method == 'adaptive':
-            gray = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                       cv2.THRESH_BINARY, 11, 2)
-        elif method == 'otsu':
-            _, gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-
-        # Contrast enhancement
-        if config.config['ocr']['preprocessing']['contrast_enhance']:
-            gray = cv2.equalizeHist(gray)
-
-        # Deskew
-        if config.config['ocr']['preprocessing']['deskew']:
-            gray = ImagePreprocessor.deskew(gray)
-
-        return gray
-
-    @staticmethod
-    def deskew(image):
-        coords = np.column_stack(np.where(image > 0))
-        angle = cv2.minAreaRect(coords)[-1]
-        if angle < -45:
-            angle = 90 + angle
-        (h, w) = image.shape[:2]
-        center = (w // 2, h // 2)
-        M = cv2.getRotationMatrix2D(center, angle, 1.0)
-        rotated = cv2.warpAffine(image, M, (w, h), flags=cv2.INTER_CUBIC, 
-                                borderMode=cv2.BORDER_REPLICATE)
-        return rotated
-
-class VideoRecorder:
-    def __init__(self, config):
-        self.config = config
-        self.recording = False
-        self.writer = None
-        self.frame_buffer = deque(maxlen=int(config.config['recording']['pre_alarm_duration'] * 
-                                           config.config['recording']['fps']))
-        self.lock = Lock()
-        self._setup_output_dir()
-        logging.info("VideoRecorder initialized")
-    
-    def _setup_output_dir(self):
-        out_dir = self.config.config['recording']['output_directory']
-        if not os.path.exists(out_dir):
-            os.makedirs(out_dir)
-    
-    def add_frame(self, frame):
-        if frame is not None:
-            self.frame_buffer.append(frame)
-            if self.recording and self.writer:
-                with self.lock:
-                    self.writer.write(frame)
-    
-    def start_recording(self):
-        if self.recording:
-            logging.info("Recording already in progress")
-            return
-        
-        try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = os.path.join(
-                self.config.config['recording']['output_directory'],
-                f'alarm_recording_{timestamp}.avi'
-            )
-            
-            fourcc = cv2.VideoWriter_fourcc(*'XVID')  # type: ignore # XVID codec kullan
-            self.writer = cv2.VideoWriter(
-                filename,
-                fourcc,
-                self.config.config['recording']['fps'],
-                (self.config.config['recording']['resolution']['width'],
-                 self.config.config['recording']['resolution']['height'])
-            )
-            
-            if not self.writer.isOpened():
-                raise Exception("Failed to create video writer")
-            
-            # Write pre-alarm buffer
-            with self.lock:
-                for frame in self.frame_buffer:
-                    self.writer.write(frame)
-            
-            self.recording = True
-            logging.info(f"Started recording to {filename}")
-            
-        except Exception as e:
-            self.recording = False
-            if self.writer:
-                self.writer.release()
-                self.writer = None
-            logging.error(f"Error starting recording: {str(e)}")
-            raise
     
-    def stop_recording(self):
-        if not self.recording:
-            return
-        
-        self.recording = False
-        with self.lock:
-            if self.writer:
-                self.writer.release()
-                self.writer = None
-        logging.info("Stopped recording")
+    detection = OCRDetection(text, to_monotonic(captured_at), camera_id)
+    # Her tespit yalnızca bir kez, geldiği anda alarm için değerlendirilir
+    events = alarm_dispatcher.evaluate(camera_id, detection)
+    ocr_text_buffer.append(detection)
+    if history_store:
+        history_store.add(camera_id, captured_at, detection.text, [event.word for event in events])
+    
+    if save_ocr_text:
+        save_detected_text(text, detection.datetime.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+                           config.config['ocr']['text_save_directory'])
+    logging.debug("OCR detected: %s", detection)
+    log_count('ocr_detections', "%d OCR detections in last %.0f s")
+
+# OCR tespitleri: kamera başına halka tampon (thread-safe)
+ocr_text_buffer = DetectionStore.from_config(config)
+# Aranabilir OCR geçmişi (history.enabled kapalıysa None); __main__ içinde açılır,
+# böylece 'spawn' ile başlayan OCR süreçleri veritabanını açmaz
+history_store = None
 
 def create_main_window():
     global video_recorder  # Global değişkeni fonksiyon içinde kullanabilmek için
@@ -300,6 +118,8 @@ def create_main_window():
     
     canvas = tk.Canvas(main_frame, width=640, height=480)
     canvas.pack()
+    # Tek bir canvas görüntüsü, FPS sınırlı yeniden çizim
+    renderer = get_renderer(canvas, config.get('display', 'fps', default=15))
 
     def test_camera_callback():
         url = url_entry.get().strip()
@@ -341,6 +161,8 @@ def create_main_window():
         # Run OCR directly
         ocr_text_detection(url, canvas, root)
 
+    recording_state = {'until': 0.0}
+
     def handle_alarm(word):
         """Alarm tetiklendiğinde yapılacak işlemler"""
         global video_recorder
@@ -354,8 +176,12 @@ def create_main_window():
 
         try:
             if config.config['recording']['enabled']:
+                # Üst üste gelen alarmlar aynı kaydı uzatır
+                recording_state['until'] = time.time() + config.config['recording']['post_alarm_duration']
                 if not video_recorder.recording:
                     video_recorder.start_recording()
+                    if not video_recorder.recording:
+                        return  # kodek yok, kayıt devre dışı (loglandı)
                     recording_status.config(text="Recording...", fg="red")
                     
                     # Post-alarm kaydını durdurmak için zamanlayıcı
@@ -369,6 +195,11 @@ def create_main_window():
 
     def stop_recording(word):
         """Kayıt durdurma işlemi"""
+        remaining = recording_state['until'] - time.time()
+        if remaining > 0:
+            # Kayıt sırasında yeni alarm geldi, durdurmayı ertele
+            root.after(int(remaining * 1000) + 1, lambda: stop_recording(word))
+            return
         try:
             if video_recorder and video_recorder.recording:
                 video_recorder.stop_recording()
@@ -377,25 +208,30 @@ def create_main_window():
         except Exception as e:
             logging.error(f"Error stopping recording: {str(e)}")
 
-    def continuous_alarm_check():
-        """Sürekli alarm kontrolü yapan thread"""
-        while True:
-            try:
-                detected_word = ocr_text_alarm_detection(ocr_text_alarm_words, ocr_text_buffer)
-                if detected_word:
-                    # GUI güncellemelerini ana thread'de yap
-                    root.after(0, lambda w=detected_word: handle_alarm(w))
-            except Exception as e:
-                logging.error(f"Error in alarm check: {str(e)}")
-            finally:
-                time.sleep(1.0)  # Her saniye kontrol et
+    alarm_queue = alarm_dispatcher.subscribe()
+
+    def process_alarm_events():
+        """Alarm kuyruğunu ana thread'de boşalt (GUI güncellemeleri burada yapılır)"""
+        try:
+            while True:
+                event = alarm_queue.get_nowait()
+                if camera_manager and event.camera_id in camera_manager.pipelines:
+                    # Çoklu kamera hattı kendi kaydını yönetir
+                    status_label.config(text=f"ALARM! [{event.camera_id}] Tehlikeli kelime bulundu: {event.word}")
+                else:
+                    handle_alarm(event.word)
+        except queue.Empty:
+            pass
+        except Exception as e:
+            logging.error(f"Error in alarm handling: {str(e)}")
+        root.after(100, process_alarm_events)
 
     def clear_alarm_status():
         status_label.config(text="Hazır")
     
     def reset_alarm_detection():
-        global ocr_text_buffer
         ocr_text_buffer.clear()
+        alarm_dispatcher.reset()
         status_label.config(text="Alarm durumu sıfırlandı.")
 
     button_frame = tk.Frame(test_frame)
@@ -414,11 +250,33 @@ def create_main_window():
         else:
             save_button.config(text="Start Saving")
             logging.info("Text saving disabled")
+        if camera_manager:
+            camera_manager.set_save_text(save_ocr_text)
 
     # Add save button after other buttons
     save_button = tk.Button(button_frame, text="Start Saving", command=toggle_save_text)
     save_button.pack(side=tk.LEFT, padx=5)
 
+    def toggle_all_cameras():
+        """config.yaml'daki tüm kameraları başlat/durdur"""
+        global camera_manager
+        if camera_manager is None:
+            # Tespitler GUI'nin tamponuna düşer; kaydetme düğmesi tüm kameralara uygulanır
+            camera_manager = CameraManager(config, engine=get_ocr_engine(), alarms=alarm_dispatcher,
+                                           history=history_store, detections=ocr_text_buffer)
+            camera_manager.set_save_text(save_ocr_text)
+            camera_manager.start()
+            cameras_button.config(text="Stop All Cameras")
+            status_label.config(text=f"{len(camera_manager.pipelines)} kamera izleniyor")
+        else:
+            camera_manager.stop()
+            camera_manager = None
+            cameras_button.config(text="Start All Cameras")
+            status_label.config(text="Kameralar durduruldu")
+
+    cameras_button = tk.Button(button_frame, text="Start All Cameras", command=toggle_all_cameras)
+    cameras_button.pack(side=tk.LEFT, padx=5)
+
     button_frame_alarm = tk.Frame(test_frame)
     button_frame_alarm.pack(side=tk.RIGHT, pady=5)
     
@@ -436,8 +294,7 @@ def create_main_window():
     def set_alarm_words():
         words = alarm_words_entry.get().strip()
         if words:
-            global ocr_text_alarm_words
-            ocr_text_alarm_words = words.split(',')
+            update_alarm_words(words.split(','))
             messagebox.showinfo("Bilgi", "Alarm kelimeleri ayarlandı.")
             
     def handle_export():
@@ -498,7 +355,7 @@ def create_main_window():
     
     def update_ocr_display():
         ocr_text.delete(1.0, tk.END)
-        for detection in ocr_text_buffer[-10:]:  # Son 10 tespiti göster
+        for detection in ocr_text_buffer.latest(10):  # Son 10 tespiti göster
             ocr_text.insert(tk.END, str(detection) + "\n")
         root.after(1000, update_ocr_display)  # Her saniye güncelle
     
@@ -518,11 +375,79 @@ def create_main_window():
 
     threshold_var = tk.StringVar(value=config.config['ocr']['preprocessing']['threshold_method'])
     tk.Label(preproc_frame, text="Threshold:").pack(side=tk.LEFT, padx=5)
+    def change_threshold(method):
+        config.config['ocr']['preprocessing']['threshold_method'] = method
+        config.save_config()  # sürüm değişir, ön işleme yeniden derlenir
+
     threshold_menu = tk.OptionMenu(preproc_frame, threshold_var, 
                                  "simple", "adaptive", "otsu",
-                                 command=lambda x: config.save_config())
+                                 command=change_threshold)
     threshold_menu.pack(side=tk.LEFT)
 
+    # OCR bölgeleri (ROI) için frame
+    roi_frame = tk.LabelFrame(test_frame, text="OCR Regions")
+    roi_frame.pack(pady=5, padx=5, fill=tk.X)
+    roi_drag = {}
+
+    def draw_rois():
+        """Mevcut URL için ayarlı bölgeleri canvas üzerinde göster"""
+        canvas.delete("roi")
+        for region in get_rois(config, url_entry.get().strip()):
+            # Bölgeler kare pikselinde saklanır, canvas ölçeğine çevrilir
+            x, y, w, h = renderer.to_canvas(region)
+            canvas.create_rectangle(x, y, x + w, y + h, outline="lime", width=2, tags="roi")
+
+    def on_roi_press(event):
+        if not roi_edit_var.get():
+            return
+        roi_drag['start'] = (event.x, event.y)
+        roi_drag['item'] = canvas.create_rectangle(event.x, event.y, event.x, event.y,
+                                                   outline="yellow", width=2, tags="roi")
+
+    def on_roi_drag(event):
+        if 'item' in roi_drag:
+            x0, y0 = roi_drag['start']
+            canvas.coords(roi_drag['item'], x0, y0, event.x, event.y)
+
+    def on_roi_release(event):
+        if 'item' not in roi_drag:
+            return
+        x0, y0 = roi_drag.pop('start')
+        roi_drag.pop('item')
+        x, y = min(x0, event.x), min(y0, event.y)
+        w, h = abs(event.x - x0), abs(event.y - y0)
+        url = url_entry.get().strip()
+        if url and w >= 5 and h >= 5:
+            region = renderer.to_frame((x, y, w, h))
+            set_rois(config, url, get_rois(config, url) + [region])
+            config.save_config()
+            logging.info(f"ROI added for {url}: {region}")
+        draw_rois()
+
+    def clear_rois():
+        url = url_entry.get().strip()
+        set_rois(config, url, [])
+        config.save_config()
+        draw_rois()
+
+    def toggle_auto_detect():
+        config.config['ocr'].setdefault('roi', {})['auto_detect'] = auto_roi_var.get()
+        config.save_config()
+
+    roi_edit_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(roi_frame, text="Edit Regions (drag on video)",
+                   variable=roi_edit_var, command=draw_rois).pack(side=tk.LEFT)
+    tk.Button(roi_frame, text="Clear Regions", command=clear_rois).pack(side=tk.LEFT, padx=5)
+    auto_roi_var = tk.BooleanVar(value=config.get('ocr', 'roi', 'auto_detect', default=False))
+    tk.Checkbutton(roi_frame, text="Auto-detect Text Regions",
+                   variable=auto_roi_var, command=toggle_auto_detect).pack(side=tk.LEFT)
+
+    canvas.bind("<ButtonPress-1>", on_roi_press)
+    canvas.bind("<B1-Motion>", on_roi_drag)
+    canvas.bind("<ButtonRelease-1>", on_roi_release)
+    renderer.on_resize = draw_rois
+    draw_rois()
+
     # Video kaydı için global değişken
     video_recorder = VideoRecorder(config)
 
@@ -549,9 +474,8 @@ def create_main_window():
     recording_status = tk.Label(recording_frame, text="Not Recording", fg="gray")
     recording_status.pack(side=tk.LEFT, padx=5)
 
-    # Alarm checking thread'ini başlat
-    alarm_thread = threading.Thread(target=continuous_alarm_check, daemon=True)
-    alarm_thread.start()
+    # Alarm olaylarını dinlemeye başla
+    process_alarm_events()
 
     # Kısayol tuşlarını kaydet
     shortcuts.register_shortcut("Control-t", lambda: test_camera_callback())
@@ -590,7 +514,8 @@ def create_main_window():
                 recording_status.config(text="Not Recording", fg="gray")
             else:
                 video_recorder.start_recording()
-                recording_status.config(text="Recording...", fg="red")
+                if video_recorder.recording:
+                    recording_status.config(text="Recording...", fg="red")
     
     # Button frame'e Help butonu ekle
     tk.Button(button_frame, text="Yardım", 
@@ -602,86 +527,54 @@ def create_main_window():
     root.mainloop()
 
 # Test for camera  stream from URL://localhost:8080/video_feed
-class CameraConnectionError(Exception):
-    """Camera bağlantı hatalarını yönetmek için özel exception sınıfı"""
-    pass
+def start_stream(source, canvas, root, on_frame=None, max_frames=None, on_stop=None):
+    """Önceki akışı durdur, yenisini Tk olay döngüsünden (root.after) çalıştır"""
+    global active_stream
+    if active_stream is not None:
+        active_stream.stop()
+    renderer = get_renderer(canvas, config.get('display', 'fps', default=15))
+    active_stream = StreamView(root, source, renderer, on_frame, max_frames, on_stop).start()
+    return active_stream
 
 def search_html_stream(url, canvas, root):
     try:
-        cap = cv2.VideoCapture(url)
-        if not cap.isOpened():
-            raise CameraConnectionError("Kamera akışı başlatılamadı")
-        
-        frame_count = 0
-        try:
-            while frame_count < 25:
-                ret, frame = cap.read()
-                if not ret or frame is None:
-                    break
-
-                # Convert the frame to RGB
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                # Convert the frame to a PIL image
-                img = Image.fromarray(frame)
-                # Convert the PIL image to an ImageTk image
-                imgtk = ImageTk.PhotoImage(image=img)
-                # Update the canvas with the new image
-                canvas.create_image(0, 0, anchor=tk.NW, image=imgtk)
-                root.update_idletasks()
-                root.update()
-                frame_count += 1
-                
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
-                    
-            return True
-        finally:
-            # Clean up resources
-            cap.release()
+        source = FrameSource(url).start()
     except CameraConnectionError as e:
         print(f"Kamera bağlantı hatası: {str(e)}")
         return False
     except Exception as e:
         print(f"Beklenmeyen hata: {str(e)}")
         return False
-    finally:
-        if 'cap' in locals():
-            cap.release() # type: ignore
+
+    # Bağlantı kuruldu; ilk 25 kare ayrı bir pencerede önizleme olarak gösterilir.
+    # active_stream'e dokunulmaz, ana ekranda çalışan (OCR) akış durmaz.
+    window = tk.Toplevel(root)
+    window.title(f"Test: {url}")
+    preview = tk.Canvas(window, width=canvas['width'], height=canvas['height'])
+    preview.pack()
+    renderer = DisplayRenderer(preview, config.get('display', 'fps', default=15))
+    view = StreamView(window, source, renderer, max_frames=25).start()
+
+    def close():
+        view.stop()
+        renderer.stop()
+        window.destroy()
+
+    window.protocol("WM_DELETE_WINDOW", close)
+    return True
 
 # Watch the camera stream from URL://localhost:8080/video_feed
 def html_stream(url, canvas, root):
-    cap = None
     try:
-        cap = cv2.VideoCapture(url)
-        if not cap.isOpened():
-            raise CameraConnectionError("Kamera akışı başlatılamadı")
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret or frame is None:
-                break
-
-            # Convert the frame to RGB
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            # Convert the frame to a PIL image
-            img = Image.fromarray(frame)
-            # Convert the PIL image to an ImageTk image
-            imgtk = ImageTk.PhotoImage(image=img)
-            # Update the canvas with the new image
-            canvas.create_image(0, 0, anchor=tk.NW, image=imgtk)
-            root.update_idletasks()
-            root.update()
-            
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-                    
+        source = FrameSource(url).start()
     except CameraConnectionError as e:
         messagebox.showerror("Bağlantı Hatası", str(e))
+        return
     except Exception as e:
         messagebox.showerror("Beklenmeyen Hata", f"Bir hata oluştu: {str(e)}")
-    finally:
-        if cap is not None:
-            cap.release()
+        return
+
+    start_stream(source, canvas, root)
 
 # Test for camera stream from URL://localhost:8080/video_feed
 def test_camera(url, canvas, root):
@@ -707,94 +600,56 @@ def test_camera(url, canvas, root):
 
 # OCR text detection from camera stream from URL://localhost:8080/video_feed
 def ocr_text_detection(url, canvas, root):
-    global video_recorder  # Global değişkeni fonksiyon içinde kullanabilmek için
-    
     logging.info(f"Starting OCR detection for URL: {url}")
     try:
-        cap = cv2.VideoCapture(url)
-        if not cap.isOpened():
-            logging.error("Failed to open camera feed")
-            return
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret or frame is None:
-                break
-            
-            # Add frame to video buffer if recording is enabled
-            if config.config['recording']['enabled'] and video_recorder:
-                video_recorder.add_frame(frame.copy())
-            
-            # Preprocess the frame
-            processed_frame = ImagePreprocessor.preprocess_image(frame, config)
-            
-            # Use pytesseract to do OCR on the processed frame
-            text = pytesseract.image_to_string(processed_frame)
-            
-            if text.strip():
-                detection = OCRDetection(text)
-                ocr_text_buffer.append(detection)
-                if len(ocr_text_buffer) > config.config['ocr']['buffer_size']:
-                    ocr_text_buffer.pop(0)
-                
-                if save_ocr_text:
-                    save_detected_text(text, detection.timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3])
-                logging.info(f"OCR detected: {str(detection)}")
-            
-            # Convert the frame to RGB
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            # Convert the frame to a PIL image
-            img = Image.fromarray(frame)
-            # Convert the PIL image to an ImageTk image
-            imgtk = ImageTk.PhotoImage(image=img)
-            # Update the canvas with the new image
-            canvas.create_image(0, 0, anchor=tk.NW, image=imgtk)
-            root.update_idletasks()
-            root.update()
-            
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-                
+        engine = get_ocr_engine()
+        source = FrameSource(url).start()
+    except CameraConnectionError:
+        logging.error("Failed to open camera feed")
+        return
     except Exception as e:
         logging.error(f"Error in OCR detection: {str(e)}")
-    finally:
-        cap.release() # type: ignore
-        logging.info("OCR detection stopped")
+        return
 
-# OCR text alarm detection ocr_text_alarm_words = ["599:","home theater", "smoke", "danger", "alert", "warning", "hazard", "emergency"]
-# Check if any of the alarm words are present in the text buffer
-def ocr_text_alarm_detection(ocr_text_alarm_words, ocr_text_buffer):
-    """Return tetiklenen alarm kelimesini veya None"""
-    try:
-        if not ocr_text_alarm_words or not ocr_text_buffer:
-            return None
+    change_gate = FrameChangeGate(config)
+    region_detector = None
 
-        if isinstance(ocr_text_alarm_words, str):
-            ocr_text_alarm_words = [word.strip() for word in ocr_text_alarm_words.split(',')]
-        
-        for word in ocr_text_alarm_words:
-            if not word:
-                continue
-                
-            for detection in ocr_text_buffer:
-                if word.lower() in detection.text.lower():
-                    logging.warning(f"ALARM! Dangerous word detected: {word} at {detection.timestamp}")
-                    return word
-    except Exception as e:
-        logging.error(f"Error in alarm detection: {str(e)}")
-    
-    return None
+    def process_frame(frame, captured_at):
+        """Her kare için çalışır; ekrana çizim DisplayRenderer'da ayrıca yapılır"""
+        nonlocal region_detector
+        try:
+            # Add frame to video buffer if recording is enabled
+            if config.config['recording']['enabled'] and video_recorder:
+                video_recorder.add_frame(frame, captured_at)
+
+            # Preprocess + OCR run on the worker pool, results land in handle_ocr_result.
+            # Frames whose ROIs (or whole frame) did not change since the last OCR'd one are skipped.
+            rois = get_rois(config, url)
+            if change_gate.should_process(frame, captured_at, rois):
+                # Only configured regions are OCR'd; without any, optionally detect text areas
+                regions = rois
+                if not regions and config.get('ocr', 'roi', 'auto_detect', default=False):
+                    if region_detector is None:
+                        region_detector = TextRegionDetector(config)
+                    regions = region_detector.detect(frame)
+                engine.submit(frame, captured_at,
+                              lambda text, ts: handle_ocr_result(text, ts, url),
+                              regions or None, key=url, refresh=change_gate.refresh)
+        except Exception as e:
+            logging.error(f"Error in OCR detection: {str(e)}")
+
+    def on_stop():
+        logging.info(f"OCR change gate: {change_gate.stats()}")
+        if ocr_engine is not None:
+            logging.info(f"OCR engine: {ocr_engine.stats()}")
+        logging.info("OCR detection stopped")
+
+    start_stream(source, canvas, root, on_frame=process_frame, on_stop=on_stop)
 
 # Load the alarm words from a file and add to ocr_text_alarm_words
 def load_alarm_words(filename=None):
-    global ocr_text_alarm_words
     filename = filename or config.config['alarm']['words_file']
-    try:
-        with open(filename, 'r') as f:
-            ocr_text_alarm_words = [word.strip() for word in f.readlines() if word.strip()]
-    except FileNotFoundError:
-        # Default list if file not found
-        ocr_text_alarm_words = ["599:", "home theater", "smoke", "danger", "alert", "warning", "hazard", "emergency"]
+    update_alarm_words(read_alarm_words(filename))
 
 def export_alarm_words(filename=None):
     """Alarm kelimelerini JSON formatında dışa aktar"""
@@ -831,8 +686,7 @@ def import_alarm_words(filename=None):
         try:
             with open(filename, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                global ocr_text_alarm_words
-                ocr_text_alarm_words = data['alarm_words']
+                update_alarm_words(data['alarm_words'])
             logging.info(f"Alarm words imported from {filename}")
             return True
         except Exception as e:
@@ -842,8 +696,21 @@ def import_alarm_words(filename=None):
  
 
 if __name__ == "__main__":
-    setup_logging()
+    setup_logging(config)
+    get_text_writer(config)
+    history_store = HistoryStore.from_config(config)
     load_alarm_words()
     logging.info("Application starting...")
     create_main_window()
+    if active_stream:
+        active_stream.source.stop()
+    if camera_manager:
+        camera_manager.stop()
+    if ocr_engine:
+        ocr_engine.shutdown()
+    if video_recorder:
+        video_recorder.close()
+    if history_store:
+        history_store.close()
+    get_text_writer().close()
     logging.info("Application shutting down...")
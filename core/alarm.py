@@ -0,0 +1,352 @@
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque, namedtuple
+
+
+# Turkish dotted/dotless i variants all fold to a plain 'i' so that OCR
+# output matches regardless of which one Tesseract picked
+TURKISH_FOLD = {'İ': 'i', 'I': 'i', 'ı': 'i'}
+
+AlarmMatch = namedtuple('AlarmMatch', 'word start end distance', defaults=(0,))
+WORD_PATTERN = re.compile(r'\w+')
+
+AlarmEvent = namedtuple('AlarmEvent', 'camera_id word detection match raised_at')
+
+
+def fold_text(text):
+    """Casefold text for matching; returns (folded, index map or None).
+
+    The index map gives the original position of every folded character;
+    it is None when folding kept positions unchanged (plain ASCII text).
+    """
+    if text.isascii():
+        return text.lower(), None
+
+    chars = []
+    index = []
+    for position, char in enumerate(text):
+        folded = TURKISH_FOLD.get(char) or char.casefold()
+        chars.append(folded)
+        index.extend([position] * len(folded))
+    return ''.join(chars), index
+
+
+def edit_distance(a, b, limit=None):
+    """Levenshtein distance; stops early and returns limit + 1 once it exceeds limit"""
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class DeletionIndex:
+    """Symmetric-deletion index (as used by SymSpell) for approximate lookups.
+
+    Every stored word is indexed under all strings obtained by deleting up to
+    its allowed number of characters. Two strings within edit distance k
+    share such a variant, so a lookup only generates the query's deletions
+    and verifies the few candidates, independent of the number of words.
+    """
+
+    def __init__(self):
+        self.variants = {}  # deletion variant -> set of words
+
+    @staticmethod
+    def deletions(word, depth):
+        results = {word}
+        frontier = {word}
+        for _ in range(depth):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+            results |= frontier
+        return results
+
+    def add(self, word, max_distance):
+        for variant in self.deletions(word, max_distance):
+            self.variants.setdefault(variant, set()).add(word)
+
+    def search(self, word, max_distance):
+        """[(distance, word)] for stored words within max_distance"""
+        candidates = set()
+        for variant in self.deletions(word, max_distance):
+            candidates.update(self.variants.get(variant, ()))
+        results = []
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                results.append((distance, candidate))
+        return results
+
+
+class AlarmMatcher:
+    """Aho-Corasick automaton over the alarm words.
+
+    Built once per word list; find_all() scans a text in a single pass and
+    reports every occurrence of every word, case- and Turkish-i-insensitive.
+
+    With max_distance > 0 it also finds OCR-garbled words: the text is split
+    into word tokens and every run of as many tokens as an alarm word has is
+    looked up in a deletion index, accepting matches within the word's
+    allowed edit distance. Words shorter than min_length only match exactly;
+    word_distances overrides the limit per word. Words of several tokens
+    always go through the token lookup, so "home  theater" or a line
+    break between the words still matches "home theater".
+    """
+
+    def __init__(self, words, max_distance=0, min_length=5, word_distances=None):
+        self.source_words = list(words)
+        self.words = []
+        seen = set()
+        for word in words:
+            word = word.strip()
+            folded = fold_text(word)[0]
+            if word and folded not in seen:
+                seen.add(folded)
+                self.words.append(word)
+
+        self.lengths = []
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for word_index, word in enumerate(self.words):
+            folded = fold_text(word)[0]
+            self.lengths.append(len(folded))
+            node = 0
+            for char in folded:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto[node][char] = child
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = child
+            self.output[node].append(word_index)
+
+        # Breadth-first pass to fill failure links and merge outputs
+        nodes = deque(self.goto[0].values())
+        while nodes:
+            node = nodes.popleft()
+            for char, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+                nodes.append(child)
+
+        # Token lookup: one deletion index per token count of the words
+        self.fuzzy_indexes = {}
+        self.allowed_distance = {}
+        for word in self.words:
+            allowed = max(0, self._allowed_distance(word, max_distance, min_length, word_distances))
+            key = ' '.join(WORD_PATTERN.findall(fold_text(word)[0]))
+            if not key or (allowed == 0 and ' ' not in key):
+                continue
+            self.allowed_distance[key] = (word, allowed)
+            self.fuzzy_indexes.setdefault(key.count(' ') + 1, DeletionIndex()).add(key, allowed)
+        self.max_allowed = max((a for _, a in self.allowed_distance.values()), default=0)
+
+    @staticmethod
+    def _allowed_distance(word, max_distance, min_length, word_distances):
+        if word_distances and word in word_distances:
+            return int(word_distances[word])
+        if len(word) < min_length:
+            return 0
+        return max_distance
+
+    @classmethod
+    def from_config(cls, words, config):
+        """Matcher with the fuzzy settings under alarm.fuzzy"""
+        return cls(words,
+                   max_distance=int(config.get('alarm', 'fuzzy', 'max_distance', default=0)),
+                   min_length=int(config.get('alarm', 'fuzzy', 'min_length', default=5)),
+                   word_distances=config.get('alarm', 'fuzzy', 'word_distances', default=None))
+
+    def __bool__(self):
+        return bool(self.words)
+
+    def find_all(self, text):
+        """All AlarmMatch occurrences in text, with positions in the original text"""
+        if not self.words or not text:
+            return []
+
+        folded, index = fold_text(text)
+        goto, fail, output = self.goto, self.fail, self.output
+        matches = []
+        node = 0
+        for position, char in enumerate(folded):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for word_index in output[node]:
+                end = position + 1
+                start = end - self.lengths[word_index]
+                if index is not None:
+                    start, end = index[start], index[end - 1] + 1
+                matches.append(AlarmMatch(self.words[word_index], start, end))
+
+        if self.fuzzy_indexes:
+            matches.extend(self._find_fuzzy(folded, index, matches))
+        matches.sort(key=lambda m: m.start)
+        return matches
+
+    def _find_fuzzy(self, folded, index, exact_matches):
+        tokens = [(m.group(), m.start(), m.end()) for m in WORD_PATTERN.finditer(folded)]
+        exact_spans = {}
+        for match in exact_matches:
+            exact_spans.setdefault(match.word, []).append((match.start, match.end))
+
+        found = []
+        lookups = {}
+        for size, fuzzy_index in self.fuzzy_indexes.items():
+            for first in range(len(tokens) - size + 1):
+                window = tokens[first:first + size]
+                candidate = ' '.join(token for token, _, _ in window)
+                hits = lookups.get(candidate)
+                if hits is None:
+                    hits = lookups[candidate] = fuzzy_index.search(candidate, self.max_allowed)
+
+                for distance, key in hits:
+                    word, allowed = self.allowed_distance[key]
+                    if distance > allowed:
+                        continue
+                    start, end = window[0][1], window[-1][2]
+                    if index is not None:
+                        start, end = index[start], index[end - 1] + 1
+                    # An exact hit of the same word already covers this span
+                    if any(s < end and start < e for s, e in exact_spans.get(word, ())):
+                        continue
+                    found.append(AlarmMatch(word, start, end, distance))
+        return found
+
+    def search(self, text):
+        """First matched alarm word in text, or None"""
+        matches = self.find_all(text)
+        return matches[0].word if matches else None
+
+
+class AlarmDispatcher:
+    """Evaluates every detection once, as it is produced, and publishes alarms.
+
+    A word fires at most once per `alarm.cooldown` seconds per camera; later
+    hits inside the cooldown are counted as suppressed. Alarms are delivered
+    as AlarmEvent objects to every subscriber queue; a full queue drops its
+    oldest event so slow subscribers never block the OCR workers.
+    """
+
+    def __init__(self, config, words=None):
+        self.cooldown = float(config.get('alarm', 'cooldown', default=10))
+        self.queue_size = int(config.get('alarm', 'queue_size', default=100))
+        self.config = config
+        self.matcher = AlarmMatcher.from_config(words or [], config)
+        self.lock = threading.Lock()
+        self.last_raised = {}  # (camera_id, word) -> monotonic time
+        self.subscribers = []
+        self.raised = 0
+        self.suppressed = 0
+
+    def set_words(self, words):
+        self.matcher = AlarmMatcher.from_config(words, self.config)
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self.lock:
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def evaluate(self, camera_id, detection):
+        """Match a new detection and publish its alarms; returns the raised events"""
+        matches = self.matcher.find_all(detection.text)
+        if not matches:
+            return []
+
+        now = time.monotonic()
+        events = []
+        with self.lock:
+            words = set()
+            for match in matches:
+                if match.word in words:
+                    continue
+                words.add(match.word)
+                key = (camera_id, match.word)
+                last = self.last_raised.get(key)
+                if last is not None and now - last < self.cooldown:
+                    self.suppressed += 1
+                    continue
+                self.last_raised[key] = now
+                events.append(AlarmEvent(camera_id, match.word, detection, match, time.time()))
+            self.raised += len(events)
+            subscribers = list(self.subscribers)
+
+        for event in events:
+            match = event.match
+            fuzzy = f" as '{detection.text[match.start:match.end]}' (distance {match.distance})" if match.distance else ""
+            logging.warning(f"ALARM! [{camera_id}] Dangerous word detected: {event.word}{fuzzy} at {detection.datetime}")
+            for subscriber in subscribers:
+                self._publish(subscriber, event)
+        return events
+
+    @staticmethod
+    def _publish(subscriber, event):
+        try:
+            subscriber.put_nowait(event)
+        except queue.Full:
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def reset(self, camera_id=None):
+        """Forget cooldowns (for one camera or all) so words can fire again"""
+        with self.lock:
+            if camera_id is None:
+                self.last_raised.clear()
+            else:
+                for key in [k for k in self.last_raised if k[0] == camera_id]:
+                    del self.last_raised[key]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'words': len(self.matcher.words),
+                'raised': self.raised,
+                'suppressed': self.suppressed,
+                'subscribers': len(self.subscribers)
+            }
+
+
+DEFAULT_ALARM_WORDS = ["599:", "home theater", "smoke", "danger", "alert", "warning", "hazard", "emergency"]
+
+
+def read_alarm_words(filename):
+    """Alarm kelimelerini dosyadan oku (satır başına bir kelime)"""
+    try:
+        with open(filename, 'r') as f:
+            return [word.strip() for word in f.readlines() if word.strip()]
+    except FileNotFoundError:
+        # Default list if file not found
+        return list(DEFAULT_ALARM_WORDS)
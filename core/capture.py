@@ -0,0 +1,277 @@
+import logging
+import re
+import threading
+import time
+import urllib.request
+
+import cv2
+import numpy as np
+
+
+class CameraConnectionError(Exception):
+    """Camera bağlantı hatalarını yönetmek için özel exception sınıfı"""
+    pass
+
+
+HEADER_END = re.compile(rb'\r?\n\r?\n')
+
+
+def multipart_boundary(content_type):
+    """Boundary token of a multipart Content-Type header (without leading dashes), or None"""
+    match = re.search(r'boundary="?([^";]+)"?', content_type or '')
+    return match.group(1).strip().lstrip('-') if match else None
+
+
+def iter_mjpeg(stream, boundary=None, chunk_size=65536):
+    """Yield the JPEG parts of a multipart (x-mixed-replace) MJPEG byte stream as they arrive.
+
+    A part is cut by its Content-Length header or, without one, at the next
+    boundary line. Scanning for the JPEG end marker instead would truncate
+    frames whose EXIF/APP1 thumbnail carries its own end marker. Without a
+    boundary the first "--..." line of the stream is taken as one.
+    """
+    read = getattr(stream, 'read1', stream.read)
+    buffer = bytearray()
+    delimiter = b'--' + boundary.encode() if boundary else None
+
+    def fill():
+        chunk = read(chunk_size)
+        buffer.extend(chunk)
+        return bool(chunk)
+
+    while True:
+        # Part headers: boundary line, "Name: value" lines, blank line
+        header_end = HEADER_END.search(buffer)
+        while header_end is None:
+            if not fill():
+                return
+            header_end = HEADER_END.search(buffer)
+        lines = bytes(buffer[:header_end.start()]).splitlines()
+        body_start = header_end.end()
+
+        length = None
+        for line in lines:
+            line = line.strip()
+            if delimiter is None and line.startswith(b'--'):
+                delimiter = b'--' + line.lstrip(b'-')
+            elif line.lower().startswith(b'content-length:'):
+                try:
+                    length = int(line.split(b':', 1)[1])
+                except ValueError:
+                    length = None
+        if delimiter is not None and any(line.strip() == delimiter + b'--' for line in lines):
+            return  # closing boundary
+
+        if length is not None:
+            while len(buffer) < body_start + length:
+                if not fill():
+                    return
+            part = bytes(buffer[body_start:body_start + length])
+            del buffer[:body_start + length]
+        else:
+            if delimiter is None:
+                raise ValueError("MJPEG stream has no multipart boundary")
+            end = buffer.find(delimiter, body_start)
+            while end < 0:
+                if not fill():
+                    return
+                end = buffer.find(delimiter, body_start)
+            part = bytes(buffer[body_start:end]).rstrip(b'-').rstrip(b'\r\n')
+            del buffer[:end]
+
+        if part.startswith(b'\xff\xd8'):
+            yield part
+
+
+class FrameSource:
+    """Reads a cv2.VideoCapture on its own thread and keeps only the newest frame.
+
+    Consumers call read() with the sequence number they last saw and get the
+    current frame if a newer one exists, so each consumer pulls at its own
+    rate and a slow one skips frames instead of lagging behind the stream.
+
+    With `on_packet`, an HTTP MJPEG stream is read directly instead: every
+    original JPEG is handed to on_packet(data, captured_at) (e.g. a recorder
+    storing it as-is) and only the frames consumers actually read are
+    decoded; read_encoded() hands out the JPEG itself, e.g. for a cheap
+    reduced decode before deciding whether the full frame is needed. Other streams fall back to cv2.VideoCapture (`passthrough` is
+    False then).
+    """
+
+    def __init__(self, url, name=None, on_packet=None):
+        self.url = url
+        self.name = name or url
+        self.on_packet = on_packet
+        self.passthrough = False
+        self.cap = None
+        self.stream = None
+        self.boundary = None
+        self.running = False
+        self._thread = None
+        self._cond = threading.Condition(threading.Lock())
+        self._frame = None
+        self._packet = None
+        self._captured_at = 0.0
+        self._seq = 0
+        self._consumed = True
+        self.frames_captured = 0
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+        self.frames_decoded = 0
+        self.last_latency = 0.0
+
+    def _open_mjpeg(self):
+        """Open the URL as a multipart MJPEG stream, None if it is something else"""
+        if not self.url.lower().startswith(('http://', 'https://')):
+            return None
+        try:
+            stream = urllib.request.urlopen(self.url, timeout=10)
+        except Exception as e:
+            raise CameraConnectionError(f"Kamera akışı başlatılamadı: {str(e)}")
+        content_type = stream.headers.get('Content-Type', '')
+        if 'multipart' not in content_type:
+            stream.close()
+            return None
+        self.boundary = multipart_boundary(content_type)
+        return stream
+
+    def start(self):
+        if self.on_packet:
+            self.stream = self._open_mjpeg()
+            self.passthrough = self.stream is not None
+            if not self.passthrough:
+                logging.info(f"{self.url} is not an MJPEG stream, recording will re-encode")
+
+        if not self.passthrough:
+            self.cap = cv2.VideoCapture(self.url)
+            if not self.cap.isOpened():
+                self.cap.release()
+                self.cap = None
+                raise CameraConnectionError("Kamera akışı başlatılamadı")
+
+        self.running = True
+        self._thread = threading.Thread(target=self._mjpeg_loop if self.passthrough else self._grab_loop,
+                                        name=f"FrameSource-{self.name}",
+                                        daemon=True)
+        self._thread.start()
+        logging.info(f"Frame source started for {self.url}")
+        return self
+
+    def stop(self, timeout=2.0):
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        logging.info(f"Frame source stopped for {self.url}: {self.stats()}")
+
+    def _grab_loop(self):
+        try:
+            while self.running:
+                ret, frame = self.cap.read()
+                if not ret or frame is None:
+                    logging.warning(f"Stream ended for {self.url}")
+                    break
+
+                captured_at = time.time()
+                with self._cond:
+                    # Nobody picked up the previous frame, it is overwritten
+                    if not self._consumed:
+                        self.frames_dropped += 1
+                    self._frame = frame
+                    self._captured_at = captured_at
+                    self._seq += 1
+                    self._consumed = False
+                    self.frames_captured += 1
+                    self._cond.notify_all()
+        except Exception as e:
+            logging.error(f"Error in frame grabber for {self.url}: {str(e)}")
+        finally:
+            with self._cond:
+                self.running = False
+                self._cond.notify_all()
+            # Release on the grabber thread so it never races a pending cap.read()
+            self.cap.release()
+
+    def _mjpeg_loop(self):
+        try:
+            for packet in iter_mjpeg(self.stream, self.boundary):
+                if not self.running:
+                    break
+                captured_at = time.time()
+                self.on_packet(packet, captured_at)
+                with self._cond:
+                    if not self._consumed:
+                        self.frames_dropped += 1
+                    # Decoded lazily by the first consumer that reads it
+                    self._packet = packet
+                    self._frame = None
+                    self._captured_at = captured_at
+                    self._seq += 1
+                    self._consumed = False
+                    self.frames_captured += 1
+                    self._cond.notify_all()
+            else:
+                logging.warning(f"Stream ended for {self.url}")
+        except Exception as e:
+            logging.error(f"Error in MJPEG reader for {self.url}: {str(e)}")
+        finally:
+            with self._cond:
+                self.running = False
+                self._cond.notify_all()
+            self.stream.close()
+
+    def _wait(self, last_seq, timeout):
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > last_seq or not self.running,
+                                timeout)
+            if self._seq <= last_seq:
+                return None
+            self._consumed = True
+            self.frames_delivered += 1
+            self.last_latency = time.time() - self._captured_at
+            return self._seq, self._frame, self._packet, self._captured_at
+
+    def read(self, last_seq=0, timeout=None):
+        """Return (seq, frame, captured_at) newer than last_seq, or None.
+
+        Waits up to timeout seconds for a new frame (forever if None). The
+        returned frame is shared between consumers and must not be modified
+        in place. In passthrough mode frame is None if the JPEG was corrupt.
+        """
+        newest = self._wait(last_seq, timeout)
+        if newest is None:
+            return None
+        seq, frame, packet, captured_at = newest
+        if frame is None and packet is not None:
+            frame = self.decode(seq, packet)
+        return seq, frame, captured_at
+
+    def read_encoded(self, last_seq=0, timeout=None):
+        """Like read() without decoding: (seq, frame or None, jpeg or None, captured_at).
+
+        In passthrough mode frame is only set if another consumer already
+        decoded it; decode() the JPEG when the full frame is needed.
+        """
+        return self._wait(last_seq, timeout)
+
+    def decode(self, seq, packet):
+        """Decode a JPEG from read_encoded(); kept for other consumers of the same frame"""
+        # Decoded outside the lock so the reader thread is never held up
+        frame = cv2.imdecode(np.frombuffer(packet, dtype=np.uint8), cv2.IMREAD_COLOR)
+        with self._cond:
+            self.frames_decoded += 1
+            if self._seq == seq and self._frame is None:
+                self._frame = frame
+        return frame
+
+    def stats(self):
+        with self._cond:
+            return {
+                'captured': self.frames_captured,
+                'delivered': self.frames_delivered,
+                'dropped': self.frames_dropped,
+                'decoded': self.frames_decoded,
+                'passthrough': self.passthrough,
+                'latency': round(self.last_latency, 3)
+            }
@@ -0,0 +1,67 @@
+import logging
+import os
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+
+# fourcc -> container extension. MJPG is intra-only and cheapest on CPU,
+# the inter-frame codecs are slower but give much smaller files.
+CODECS = {
+    'MJPG': '.avi',
+    'XVID': '.avi',
+    'mp4v': '.mp4',
+    'avc1': '.mp4',
+    'H264': '.mkv'
+}
+# Order tried for `recording.format: auto`, fastest first
+PREFERENCE = ['MJPG', 'XVID', 'mp4v', 'avc1', 'H264']
+
+_probed = {}
+_probe_lock = threading.Lock()
+
+
+def open_writer(path, codec, fps, size):
+    """cv2.VideoWriter for path + the codec's extension; returns (writer, filename)"""
+    filename = path + CODECS.get(codec, '.avi')
+    writer = cv2.VideoWriter(filename, cv2.VideoWriter_fourcc(*codec), fps, size)
+    return writer, filename
+
+
+def probe_codec(codec, fps=20, size=(64, 48)):
+    """True if this OpenCV build can actually write the codec (result is cached)"""
+    with _probe_lock:
+        if codec in _probed:
+            return _probed[codec]
+        works = False
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                writer, filename = open_writer(os.path.join(directory, 'probe'), codec, fps, size)
+                if writer.isOpened():
+                    writer.write(np.zeros((size[1], size[0], 3), dtype=np.uint8))
+                    writer.release()
+                    works = os.path.exists(filename) and os.path.getsize(filename) > 0
+            except Exception:
+                works = False
+        _probed[codec] = works
+        return works
+
+
+def select_codec(config):
+    """Validate `recording.format` ('auto' = fastest available) and return the fourcc.
+
+    An unavailable or unknown codec falls back to the fastest one that works.
+    """
+    requested = config.get('recording', 'format', default='XVID') or 'auto'
+    fps = config.config['recording']['fps']
+    if requested != 'auto':
+        if requested in CODECS and probe_codec(requested, fps):
+            return requested
+        logging.warning(f"Recording format '{requested}' is not available, choosing another codec")
+
+    for codec in PREFERENCE:
+        if probe_codec(codec, fps):
+            logging.info(f"Recording codec: {codec}")
+            return codec
+    raise RuntimeError("No working video codec found for recording")
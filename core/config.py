@@ -0,0 +1,174 @@
+import logging
+
+import yaml
+
+
+class Config:
+    def __init__(self, config_file="config.yaml"):
+        self.config = {}
+        self.config_file = config_file
+        self.version = 0  # bumped on every load/save so compiled settings can be refreshed
+        self.load_config()
+    
+    def load_config(self):
+        try:
+            with open(self.config_file, 'r') as f:
+                self.config = yaml.safe_load(f)
+            self.version += 1
+            logging.info(f"Configuration loaded from {self.config_file}")
+        except FileNotFoundError:
+            logging.warning(f"Configuration file {self.config_file} not found, using defaults")
+            self.create_default_config()
+    
+    def save_config(self):
+        try:
+            with open(self.config_file, 'w') as f:
+                yaml.dump(self.config, f, default_flow_style=False)
+            self.version += 1
+            logging.info(f"Configuration saved to {self.config_file}")
+        except Exception as e:
+            logging.error(f"Failed to save configuration: {str(e)}")
+
+    def get(self, *keys, default=None):
+        """Nested config value, or default if any key is missing (older config files)"""
+        value = self.config
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                return default
+            value = value[key]
+        return value
+    
+    def create_default_config(self):
+        self.config = {
+            'camera': {
+                'default_url': 'http://localhost:8080/video_feed',
+                'frame_width': 640,
+                'frame_height': 480,
+                'connection_timeout': 10,
+                'reconnect_delay': 5
+            },
+            # Multi-camera monitoring, e.g.
+            # - {id: gate, url: 'rtsp://10.0.0.5/stream', rois: [[0, 0, 320, 80]], record: true}
+            'cameras': [],
+            'ocr': {
+                'buffer_size': 100,
+                'save_detected_text': False,
+                'text_save_directory': 'detected_texts',
+                # Saved text is written in batches by a background thread
+                'text_log': {
+                    'flush_interval': 1.0,
+                    'buffer_lines': 200,
+                    'fsync': 'never',  # never, flush, periodic
+                    'fsync_interval': 10.0,
+                    'max_mb': 0  # 0: one file per day
+                },
+                'tesseract_path': '/usr/local/bin/tesseract',
+                'backend': 'pytesseract',
+                'language': 'eng',
+                'workers': 2,
+                'executor': 'thread',
+                'queue_size': 1,
+                'change_detection': {
+                    'enabled': True,
+                    # OCR when min_cells grid cells (~8 px, ROI-local) changed by threshold (0-255)
+                    'threshold': 20.0,
+                    'min_cells': 2,
+                    'max_interval': 5.0
+                },
+                'cache': {
+                    # Per image/ROI crop: dHash within max_distance bits, confirmed
+                    # by a thumbnail whose pixels differ by at most verify_threshold
+                    'enabled': True,
+                    'capacity': 128,
+                    'max_distance': 6,
+                    'verify_threshold': 64,
+                    'ttl': 300
+                },
+                'roi': {
+                    'regions': {},
+                    'auto_detect': False,
+                    'parallel': True,
+                    'padding': 4,
+                    'max_regions': 8
+                },
+                'preprocessing': {
+                    'enabled': False,
+                    'resize_width': 640,  # wider images are scaled down to this
+                    'denoise': True,
+                    # median | gaussian | bilateral | nlm | nlm_reduced | temporal
+                    'denoise_method': 'median',
+                    'temporal_alpha': 0.5,
+                    'threshold_method': 'adaptive',
+                    'contrast_enhance': True,
+                    'deskew': True,
+                    'deskew_interval': 30,
+                    'deskew_min_angle': 0.5,
+                    'deskew_max_width': 320,
+                    'deskew_scene_threshold': 25
+                }
+            },
+            'alarm': {
+                'default_words': ["599:", "home theater", "smoke", "danger", "alert", "warning", "hazard", "emergency"],
+                'words_file': 'alarm_words.txt',
+                'cooldown': 10,
+                'queue_size': 100,
+                # Approximate matching for OCR errors (0 = exact only). A global
+                # distance also hits ordinary words (spoke -> smoke); prefer
+                # opting in per word, e.g. word_distances: {emergency: 2}
+                'fuzzy': {
+                    'max_distance': 0,
+                    'min_length': 5,
+                    'word_distances': {}
+                }
+            },
+            'logging': {
+                'level': 'INFO',
+                'directory': 'logs',
+                'format': '%(asctime)s - %(levelname)s - %(message)s',
+                'max_mb': 10,  # the log file rotates at this size
+                'backup_count': 5,
+                # Repeated hot-path messages are logged at most once per interval
+                'rate_limit_interval': 10
+            },
+            'display': {
+                'fps': 15
+            },
+            'history': {
+                # SQLite FTS5 index of every detection; search with `python -m core.history`
+                'enabled': False,
+                'path': 'logs/history.db',
+                'batch_size': 500,
+                'flush_interval': 1.0
+            },
+            'headless': {
+                'status_file': 'logs/status.json',
+                'status_interval': 10
+            },
+            'recording': {
+                'enabled': False,
+                'output_directory': 'recordings',
+                'format': 'XVID',
+                'fps': 20,
+                'resolution': {
+                    'width': 640,
+                    'height': 480
+                },
+                'pre_alarm_duration': 5,
+                'post_alarm_duration': 10,
+                'writer_queue': 40,
+                'overflow_policy': 'drop_oldest',
+                'buffer': {
+                    'mode': 'raw',
+                    'memory_mb': 64,
+                    'jpeg_quality': 85
+                },
+                'continuous': {
+                    'enabled': False,
+                    'segment_duration': 60,
+                    'retention_hours': 24,
+                    'jpeg_quality': 85,
+                    'passthrough': False
+                }
+            }
+        }
+        self.save_config()
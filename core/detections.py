@@ -0,0 +1,202 @@
+import threading
+import time
+from datetime import datetime
+
+# Detections are stamped with time.monotonic(); this converts back to wall clock
+WALL_OFFSET = time.time() - time.monotonic()
+
+
+def to_monotonic(wall_time):
+    """time.time() value (e.g. FrameSource captured_at) -> monotonic timestamp"""
+    return wall_time - WALL_OFFSET
+
+
+class OCRDetection:
+    __slots__ = ('timestamp', 'camera_id', 'text', 'confidence')
+
+    def __init__(self, text, timestamp=None, camera_id=None, confidence=None):
+        self.text = text.strip()
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+        self.camera_id = camera_id
+        self.confidence = confidence
+
+    @property
+    def datetime(self):
+        return datetime.fromtimestamp(self.timestamp + WALL_OFFSET)
+
+    def __str__(self):
+        return f"[{self.datetime.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}] {self.text}"
+
+
+class DetectionRing:
+    """Fixed-size ring of detections of one camera, kept in timestamp order.
+
+    Appends overwrite the oldest slot in O(1). OCR workers can finish a few
+    frames out of order; such a detection is moved back to its place, which
+    costs as many steps as it is late. One older than everything a full
+    ring holds is dropped. Sequence numbers grow forever, slot of sequence
+    n is n % capacity.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self.slots = [None] * self.capacity
+        self.total = 0
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    @property
+    def oldest(self):
+        return max(0, self.total - self.capacity)
+
+    def append(self, detection):
+        slots, capacity = self.slots, self.capacity
+        if self.total >= capacity and detection.timestamp < slots[self.oldest % capacity].timestamp:
+            return False
+        seq = self.total
+        slots[seq % capacity] = detection
+        self.total += 1
+        while seq > self.oldest:
+            previous = slots[(seq - 1) % capacity]
+            if previous.timestamp <= detection.timestamp:
+                break
+            slots[seq % capacity], slots[(seq - 1) % capacity] = previous, detection
+            seq -= 1
+        return True
+
+    def get(self, seq):
+        return self.slots[seq % self.capacity]
+
+    def bisect(self, timestamp):
+        """First sequence number whose detection is at or after timestamp"""
+        low, high = self.oldest, self.total
+        while low < high:
+            middle = (low + high) // 2
+            if self.slots[middle % self.capacity].timestamp < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class DetectionView:
+    """Iterates a range of a ring without copying it.
+
+    Weakly consistent: entries overwritten by newer detections while
+    iterating are skipped.
+    """
+
+    def __init__(self, ring, start, end):
+        self.ring = ring
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return max(0, self.end - max(self.start, self.ring.oldest))
+
+    def __iter__(self):
+        ring = self.ring
+        for seq in range(self.start, self.end):
+            if seq < ring.oldest:
+                continue
+            detection = ring.get(seq)
+            if seq >= ring.oldest:
+                yield detection
+
+
+class DetectionStore:
+    """Thread-safe per-camera ring buffers of OCR detections.
+
+    Capacity is `ocr.buffer_size` and can be set per camera with
+    `buffer_size` in a `cameras:` entry. Time queries use monotonic
+    timestamps (see to_monotonic) and binary search.
+    """
+
+    def __init__(self, capacity=100, capacities=None):
+        self.capacity = int(capacity)
+        self.capacities = {str(k): int(v) for k, v in (capacities or {}).items()}
+        self.rings = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        capacities = {}
+        for camera in config.get('cameras', default=None) or []:
+            if camera.get('buffer_size'):
+                capacities[camera['id']] = camera['buffer_size']
+                capacities[camera['url']] = camera['buffer_size']
+        return cls(config.config['ocr']['buffer_size'], capacities)
+
+    def _ring(self, camera_id):
+        key = str(camera_id)
+        ring = self.rings.get(key)
+        if ring is None:
+            ring = self.rings[key] = DetectionRing(self.capacities.get(key, self.capacity))
+        return ring
+
+    def append(self, detection):
+        with self.lock:
+            self._ring(detection.camera_id).append(detection)
+        return detection
+
+    def _rings(self, camera_id):
+        """Rings to read; an unknown camera has none (reads never create rings)"""
+        if camera_id is None:
+            return list(self.rings.values())
+        ring = self.rings.get(str(camera_id))
+        return [ring] if ring is not None else []
+
+    def snapshot(self, camera_id):
+        """View of the detections of a camera at this moment (no copy)"""
+        with self.lock:
+            ring = self.rings.get(str(camera_id))
+            if ring is None:
+                return []
+            return DetectionView(ring, ring.oldest, ring.total)
+
+    def between(self, start, end, camera_id=None):
+        """Detections with start <= timestamp <= end, oldest first"""
+        with self.lock:
+            rings = self._rings(camera_id)
+            detections = []
+            for ring in rings:
+                first, last = ring.bisect(start), ring.bisect(end)
+                while last < ring.total and ring.get(last).timestamp <= end:
+                    last += 1
+                detections.extend(ring.get(seq) for seq in range(first, last))
+        if camera_id is None:
+            detections.sort(key=lambda d: d.timestamp)
+        return detections
+
+    def latest(self, count=10, camera_id=None):
+        """The newest detections, oldest first"""
+        with self.lock:
+            rings = self._rings(camera_id)
+            detections = []
+            for ring in rings:
+                detections.extend(ring.get(seq) for seq in range(max(ring.oldest, ring.total - count), ring.total))
+        detections.sort(key=lambda d: d.timestamp)
+        return detections[-count:]
+
+    def clear(self, camera_id=None):
+        with self.lock:
+            if camera_id is None:
+                self.rings.clear()
+            else:
+                self.rings.pop(str(camera_id), None)
+
+    def __len__(self):
+        with self.lock:
+            return sum(len(ring) for ring in self.rings.values())
+
+    def __iter__(self):
+        with self.lock:
+            views = [DetectionView(ring, ring.oldest, ring.total) for ring in self.rings.values()]
+        for view in views:
+            yield from view
+
+    def stats(self):
+        with self.lock:
+            return {camera_id: {'stored': len(ring), 'capacity': ring.capacity, 'total': ring.total}
+                    for camera_id, ring in self.rings.items()}
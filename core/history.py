@@ -0,0 +1,237 @@
+"""Searchable OCR history in SQLite with an FTS5 full-text index.
+
+Usage: python -m core.history "smoke" --camera 7 --since 7d
+       python -m core.history --camera 7 --since 2025-01-01 --until 2025-01-02
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from core.alarm import fold_text
+from core.config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    camera TEXT NOT NULL,
+    ts REAL NOT NULL,
+    text TEXT NOT NULL,
+    alarms TEXT NOT NULL DEFAULT '',  -- one alarm word per line
+    search TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS detections_camera_ts ON detections (camera, ts);
+CREATE INDEX IF NOT EXISTS detections_ts ON detections (ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS detections_fts USING fts5 (
+    search, content='detections', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS detections_ai AFTER INSERT ON detections BEGIN
+    INSERT INTO detections_fts (rowid, search) VALUES (new.id, new.search);
+END;
+CREATE TRIGGER IF NOT EXISTS detections_ad AFTER DELETE ON detections BEGIN
+    INSERT INTO detections_fts (detections_fts, rowid, search) VALUES ('delete', old.id, old.search);
+END;
+"""
+
+
+def fts_phrase(text):
+    """Quote text as one FTS5 phrase so characters like ':' are not syntax"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def search(connection, query=None, camera=None, start=None, end=None, limit=100, raw=False):
+    """Newest matching detections as dicts (camera, timestamp, text, alarms).
+
+    query is searched as a phrase in text and alarm words; with raw=True
+    it is passed to FTS5 as-is (AND/OR/NEAR, prefix*). Both sides are
+    folded like alarm words, so "sicaklik" finds "SICAKLIK" and "sıcaklık".
+    start/end are epoch seconds.
+    """
+    conditions, params = [], []
+    if query:
+        sql = ("SELECT d.camera, d.ts, d.text, d.alarms FROM detections_fts "
+               "JOIN detections d ON d.id = detections_fts.rowid")
+        conditions.append("detections_fts MATCH ?")
+        query = fold_text(query)[0]
+        if raw:  # operators are case sensitive in FTS5
+            query = re.sub(r'\b(and|or|not|near)\b', lambda m: m.group(1).upper(), query)
+        params.append(query if raw else fts_phrase(query))
+        # Rows are inserted in time order; FTS5 walks rowids backwards without sorting
+        order = "detections_fts.rowid DESC"
+    else:
+        sql = "SELECT d.camera, d.ts, d.text, d.alarms FROM detections d"
+        order = "d.ts DESC"
+    if camera is not None:
+        conditions.append("d.camera = ?")
+        params.append(str(camera))
+    if start is not None:
+        conditions.append("d.ts >= ?")
+        params.append(float(start))
+    if end is not None:
+        conditions.append("d.ts <= ?")
+        params.append(float(end))
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(int(limit))
+
+    rows = connection.execute(sql, params).fetchall()
+    return [{'camera': camera_id, 'timestamp': ts, 'text': text, 'alarms': alarms.split('\n') if alarms else []}
+            for camera_id, ts, text, alarms in rows]
+
+
+class HistoryStore:
+    """Detection history written by a background thread in batched transactions.
+
+    add() only queues the row; the writer thread inserts up to `batch_size`
+    rows per transaction, at least every `flush_interval` seconds. The
+    database runs in WAL mode so search() from other threads/processes
+    never waits for the writer. Text and matched alarm words are indexed
+    with FTS5; time range and camera filters use the (camera, ts) index.
+    """
+
+    def __init__(self, path, batch_size=500, flush_interval=1.0, queue_size=10000):
+        self.path = path
+        self.batch_size = int(batch_size)
+        self.flush_interval = float(flush_interval)
+        self.queue = queue.Queue(maxsize=int(queue_size))
+        self.local = threading.local()
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.batches = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.commit()
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="HistoryWriter", daemon=True)
+        self.thread.start()
+        logging.info(f"OCR history: {path}")
+
+    @classmethod
+    def from_config(cls, config):
+        """HistoryStore for the `history` config section, None when disabled"""
+        if not config.get('history', 'enabled', default=False):
+            return None
+        return cls(config.get('history', 'path', default='logs/history.db'),
+                   batch_size=config.get('history', 'batch_size', default=500),
+                   flush_interval=config.get('history', 'flush_interval', default=1.0))
+
+    def _connect(self):
+        """One connection per thread (sqlite3 connections are not shareable)"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    def add(self, camera_id, timestamp, text, alarms=()):
+        """Queue one detection; timestamp is epoch seconds (time.time())"""
+        # Alarm words may contain spaces ("home theater")
+        alarms = '\n'.join(alarms)
+        search_text = fold_text(f"{text}\n{alarms}")[0]
+        try:
+            self.queue.put_nowait((str(camera_id), float(timestamp), text, alarms, search_text))
+        except queue.Full:
+            self.rows_dropped += 1
+
+    def _run(self):
+        connection = self._connect()
+        while self.running or not self.queue.empty():
+            try:
+                rows = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO detections (camera, ts, text, alarms, search) VALUES (?, ?, ?, ?, ?)", rows)
+                self.rows_written += len(rows)
+                self.batches += 1
+            except sqlite3.Error as e:
+                self.rows_dropped += len(rows)
+                logging.error(f"Failed to write OCR history: {str(e)}")
+        connection.close()
+
+    def search(self, query=None, camera=None, start=None, end=None, limit=100, raw=False):
+        return search(self._connect(), query, camera, start, end, limit, raw)
+
+    def close(self, timeout=10.0):
+        self.running = False
+        self.thread.join(timeout)
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.rows_written,
+            'dropped': self.rows_dropped,
+            'batches': self.batches
+        }
+
+
+def parse_time(value):
+    """ISO date/time or a relative age like 30m, 12h, 7d -> epoch seconds"""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd])', value)
+    if match:
+        unit = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[match.group(2)]
+        return time.time() - float(match.group(1)) * unit
+    return datetime.fromisoformat(value).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search the OCR detection history")
+    parser.add_argument('query', nargs='?', help="text to search (phrase; see --raw)")
+    parser.add_argument('--camera', help="camera id")
+    parser.add_argument('--since', help="ISO time or age (30m, 12h, 7d)")
+    parser.add_argument('--until', help="ISO time or age")
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--raw', action='store_true', help="pass the query to FTS5 unchanged")
+    parser.add_argument('--json', action='store_true', help="print JSON lines")
+    parser.add_argument('--config', default='config.yaml', help="configuration file")
+    parser.add_argument('--db', help="history database (default: history.path of the config)")
+    args = parser.parse_args(argv)
+    if args.db is None:
+        args.db = Config(args.config).get('history', 'path', default='logs/history.db')
+
+    connection = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    start = time.perf_counter()
+    rows = search(connection, args.query, args.camera,
+                  parse_time(args.since) if args.since else None,
+                  parse_time(args.until) if args.until else None,
+                  args.limit, args.raw)
+    elapsed = time.perf_counter() - start
+
+    for row in rows:
+        if args.json:
+            print(json.dumps(row, ensure_ascii=False))
+        else:
+            when = datetime.fromtimestamp(row['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+            alarms = f" [{', '.join(row['alarms'])}]" if row['alarms'] else ""
+            print(f"{when} {row['camera']:<10}{alarms} {row['text']}")
+    print(f"{len(rows)} rows in {elapsed * 1000:.1f} ms")
+    connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
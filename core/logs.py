@@ -0,0 +1,151 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener = None
+
+
+# Log yapılandırması
+def setup_logging(config):
+    """Log through a QueueHandler; a QueueListener thread does the file/terminal I/O.
+
+    Uses `logging.level` and `logging.format`; the file rotates at
+    `logging.max_mb` keeping `logging.backup_count` old files.
+    """
+    global _listener
+    settings = config.config['logging']
+    log_dir = settings['directory']
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+
+    log_file = os.path.join(log_dir, f"camera_client_{datetime.now().strftime('%Y%m%d')}.log")
+    level = logging.getLevelName(str(settings.get('level', 'INFO')).upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+    formatter = logging.Formatter(settings.get('format') or DEFAULT_FORMAT)
+
+    file_handler = RotatingFileHandler(log_file, encoding='utf-8',
+                                       maxBytes=int(float(settings.get('max_mb', 10)) * 1024 * 1024),
+                                       backupCount=int(settings.get('backup_count', 5)))
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    if _listener:
+        _listener.stop()
+    else:
+        # Runs after the other exit handlers, so their last messages are written
+        atexit.register(lambda: _listener.stop())
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+    _listener = QueueListener(log_queue, file_handler, stream_handler)
+    _listener.start()
+
+    _limiter.interval = float(settings.get('rate_limit_interval', 10))
+    if _limiter.flusher is None:
+        # Registered after the listener's stop, so it runs before it
+        atexit.register(_limiter.flush, True)
+    _limiter.start()
+    logging.info("Logging system initialized")
+
+
+class RateLimiter:
+    """Per-key rate limiting for messages logged on hot paths.
+
+    limited() logs the first message of a key in every `interval` seconds
+    and counts the rest. count() only counts. A flusher thread closes the
+    windows older than `interval`: the last suppressed message of a
+    limited() key is logged with the number of the others, e.g.
+    "Frame decode failed (+41 similar in last 10 s)", and count() keys get
+    one summary with the window's real length, e.g. "42 OCR detections in
+    last 10 s". So the last burst before a stream goes quiet is reported
+    too.
+    """
+
+    def __init__(self, interval=10.0):
+        self.interval = interval
+        self.windows = {}  # key -> [window start, suppressed count, last suppressed (level, msg, args)]
+        self.counts = {}   # key -> [window start, count, msg, level]
+        self.lock = threading.Lock()
+        self.flusher = None
+        self.stopped = threading.Event()
+
+    def limited(self, key, level, msg, *args):
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None:
+                self.windows[key] = [now, 0, None]
+                suppressed, elapsed = 0, 0.0
+            elif now - window[0] < self.interval:
+                window[1] += 1
+                window[2] = (level, msg, args)
+                return
+            else:
+                suppressed, elapsed = window[1], now - window[0]
+                window[0], window[1], window[2] = now, 0, None
+        if suppressed:
+            msg = f"{msg} (+{suppressed} similar in last {elapsed:.0f} s)"
+        logging.log(level, msg, *args, stacklevel=3)
+
+    def count(self, key, msg, level=logging.INFO):
+        """msg gets the event count and the seconds, e.g. '%d detections in last %.0f s'"""
+        with self.lock:
+            window = self.counts.get(key)
+            if window is None:
+                self.counts[key] = [time.monotonic(), 1, msg, level]
+            else:
+                window[1] += 1
+
+    def flush(self, force=False):
+        """Log the windows older than interval (all with force) and forget them"""
+        now = time.monotonic()
+        with self.lock:
+            due = [(key, window) for key, window in self.counts.items()
+                   if force or now - window[0] >= self.interval]
+            for key, _ in due:
+                del self.counts[key]
+            closed = [(key, window) for key, window in self.windows.items()
+                      if force or now - window[0] >= self.interval]
+            for key, _ in closed:
+                del self.windows[key]
+        for _, (start, suppressed, last) in closed:
+            if suppressed:
+                level, msg, args = last
+                if suppressed > 1:
+                    msg = f"{msg} (+{suppressed - 1} similar in last {now - start:.0f} s)"
+                logging.log(level, msg, *args)
+        for _, (start, count, msg, level) in due:
+            logging.log(level, msg, count, now - start)
+
+    def _run(self):
+        while not self.stopped.wait(min(1.0, self.interval / 2)):
+            self.flush()
+
+    def start(self):
+        if self.flusher is None:
+            self.flusher = threading.Thread(target=self._run, name="LogFlusher", daemon=True)
+            self.flusher.start()
+
+
+_limiter = RateLimiter()
+
+
+def log_limited(key, level, msg, *args):
+    """logging.log() at most once per key and interval; args are formatted lazily"""
+    _limiter.limited(key, level, msg, *args)
+
+
+def log_count(key, msg, level=logging.INFO):
+    _limiter.count(key, msg, level)
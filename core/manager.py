@@ -0,0 +1,300 @@
+import logging
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from core.alarm import AlarmDispatcher
+from core.capture import FrameSource, CameraConnectionError
+from core.detections import DetectionStore, OCRDetection, to_monotonic
+from core.history import HistoryStore
+from core.ocr import OCREngine, FrameChangeGate
+from core.recorder import VideoRecorder
+from core.roi import get_rois, valid_regions, TextRegionDetector
+from core.segments import SegmentRecorder
+from core.textlog import get_text_writer, save_detected_text
+
+
+class CameraPipeline:
+    """capture -> change gate -> OCR -> alarm -> record for a single camera.
+
+    Runs on its own thread and keeps its own recorder, detections go to the
+    (usually shared) DetectionStore;
+    OCR is handed to the shared engine. The recorder is only touched from the
+    pipeline thread, OCR callbacks just schedule recording.
+    """
+
+    def __init__(self, camera, config, engine, alarms, detections=None, history=None):
+        self.camera_id = str(camera['id'])
+        self.url = camera['url']
+        self.config = config
+        self.engine = engine
+        self.alarms = alarms
+
+        if camera.get('rois'):
+            self.rois = valid_regions(camera['rois'], self.camera_id)
+        else:
+            self.rois = get_rois(config, self.url)
+        self.auto_detect = camera.get('auto_detect', config.get('ocr', 'roi', 'auto_detect', default=False))
+        self.save_text = camera.get('save_text', config.get('ocr', 'save_detected_text', default=False))
+        if detections is None:
+            detections = DetectionStore(camera.get('buffer_size', config.config['ocr']['buffer_size']))
+        self.store = detections
+        self.history = history
+        self.gate = FrameChangeGate(config)
+        self.region_detector = TextRegionDetector(config) if self.auto_detect and not self.rois else None
+
+        record = camera.get('record', config.config['recording']['enabled'])
+        self.continuous = bool(record) and config.get('recording', 'continuous', 'enabled', default=False)
+        self.passthrough = self.continuous and config.get('recording', 'continuous', 'passthrough', default=False)
+        if self.continuous:
+            self.recorder = SegmentRecorder(config, name=self.camera_id)
+        else:
+            self.recorder = VideoRecorder(config, name=self.camera_id) if record else None
+        self.pre_alarm_duration = config.config['recording']['pre_alarm_duration']
+        self.post_alarm_duration = config.config['recording']['post_alarm_duration']
+        self.record_until = 0.0
+        self.clip_start = None  # continuous mode: start of the pending alarm clip
+        self.clip_lock = threading.Lock()
+        self.reconnect_delay = float(config.get('camera', 'reconnect_delay', default=5.0))
+
+        self.source = None
+        self.running = False
+        self.thread = None
+        self.detections = 0
+        self.alarms_raised = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"Camera-{self.camera_id}", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self.running = False
+        if self.source:
+            self.source.stop()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def _run(self):
+        logging.info(f"[{self.camera_id}] Pipeline started for {self.url}")
+        try:
+            while self.running:
+                try:
+                    on_packet = self.recorder.add_encoded if self.passthrough else None
+                    self.source = FrameSource(self.url, name=self.camera_id, on_packet=on_packet).start()
+                except CameraConnectionError as e:
+                    logging.error(f"[{self.camera_id}] {str(e)}, retrying in {self.reconnect_delay}s")
+                    time.sleep(self.reconnect_delay)
+                    continue
+
+                self._process_stream()
+                self.source.stop()
+                if self.running:
+                    logging.warning(f"[{self.camera_id}] Stream lost, reconnecting in {self.reconnect_delay}s")
+                    time.sleep(self.reconnect_delay)
+        except Exception as e:
+            logging.error(f"[{self.camera_id}] Pipeline error: {str(e)}")
+        finally:
+            if self.continuous:
+                # Keep what was recorded of a pending alarm clip
+                self.record_until = min(self.record_until, time.time())
+                self._update_clip()
+            if self.recorder:
+                self.recorder.close()
+            logging.info(f"[{self.camera_id}] Pipeline stopped: {self.stats()}")
+
+    def _process_stream(self):
+        seq = 0
+        while self.running:
+            self._update_recording()
+            packet = self.source.read_encoded(seq, timeout=0.5)
+            if packet is None:
+                if not self.source.running:
+                    return
+                continue
+            seq, frame, data, captured_at = packet
+
+            if frame is None and data is not None:
+                # Passthrough: the recorder already has the JPEG; the gate looks at
+                # a 1/8 grayscale decode and only frames sent to OCR are fully decoded
+                small = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+                if small is None or not self.gate.should_process(small, captured_at, self.rois, 1 / 8):
+                    continue
+                frame = self.source.decode(seq, data)
+                if frame is None:
+                    continue
+            elif frame is None:
+                continue
+            else:
+                if self.recorder and not self.source.passthrough:
+                    self.recorder.add_frame(frame, captured_at)
+                if not self.gate.should_process(frame, captured_at, self.rois):
+                    continue
+
+            regions = self.rois
+            if not regions and self.region_detector:
+                regions = self.region_detector.detect(frame)
+            self.engine.submit(frame, captured_at, self._on_ocr_result,
+                               regions or None, key=self.camera_id, refresh=self.gate.refresh)
+
+    def _update_recording(self):
+        if not self.recorder:
+            return
+        if self.continuous:
+            self._update_clip()
+            return
+        if self.record_until > time.time():
+            if not self.recorder.recording:
+                try:
+                    self.recorder.start_recording()
+                except Exception as e:
+                    logging.error(f"[{self.camera_id}] Could not start recording: {str(e)}")
+                    self.record_until = 0.0
+        elif self.recorder.recording:
+            self.recorder.stop_recording()
+
+    def _update_clip(self):
+        """Cut the alarm clip from the segments once the post-alarm time is over"""
+        with self.clip_lock:
+            if self.clip_start is None or self.record_until > time.time():
+                return
+            start, end = self.clip_start, self.record_until
+            self.clip_start = None
+        try:
+            self.recorder.extract_clip(start, end)
+        except Exception as e:
+            logging.error(f"[{self.camera_id}] Could not extract alarm clip: {str(e)}")
+
+    def _on_ocr_result(self, text, captured_at):
+        """Runs on an OCR worker thread"""
+        if not text.strip():
+            return
+
+        detection = self.store.append(OCRDetection(text, to_monotonic(captured_at), self.camera_id))
+        self.detections += 1
+
+        # Each detection is evaluated exactly once, when it is produced
+        events = self.alarms.evaluate(self.camera_id, detection)
+        if events:
+            self.alarms_raised += len(events)
+            # Overlapping alarms extend the running recording / pending clip
+            with self.clip_lock:
+                if self.continuous and self.clip_start is None:
+                    self.clip_start = captured_at - self.pre_alarm_duration
+                self.record_until = time.time() + self.post_alarm_duration
+
+        if self.history:
+            self.history.add(self.camera_id, captured_at, detection.text, [event.word for event in events])
+
+        if self.save_text:
+            save_detected_text(text, detection.datetime.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+                               self.config.config['ocr']['text_save_directory'],
+                               prefix=f"ocr_text_{self.camera_id}")
+
+    def stats(self):
+        return {
+            'url': self.url,
+            'running': self.running,
+            'detections': self.detections,
+            'alarms': self.alarms_raised,
+            'recording': self.recorder.stats() if self.recorder else None,
+            'source': self.source.stats() if self.source else None,
+            'gate': self.gate.stats()
+        }
+
+
+class CameraManager:
+    """Runs one CameraPipeline per entry of the `cameras:` config list.
+
+    All pipelines share a single OCREngine, which schedules their frames
+    round-robin, and a single AlarmDispatcher; subscribe to
+    `manager.alarms` to receive their alarms. Without a `cameras:` list the
+    `camera.default_url` is used as a single camera. An existing engine or
+    dispatcher can be passed in to share it with other users; a shared
+    engine is left running on stop(). Detections go to the given
+    DetectionStore (e.g. the GUI's) or a new one, and are also written to
+    the OCR history (`history:` config) unless a HistoryStore is passed in.
+    """
+
+    def __init__(self, config, alarm_words=None, engine=None, alarms=None, history=None, detections=None):
+        self.config = config
+        self.alarms = alarms or AlarmDispatcher(config)
+        self.detections = DetectionStore.from_config(config) if detections is None else detections
+        self.save_text = None  # None: per camera `save_text` config
+        self.text_writer = get_text_writer(config)
+        self.owns_history = history is None
+        self.history = HistoryStore.from_config(config) if history is None else history
+        if alarm_words is not None:
+            self.alarms.set_words(alarm_words)
+        self.engine = engine
+        self.owns_engine = engine is None
+        self.pipelines = {}
+
+    def camera_configs(self):
+        cameras = self.config.get('cameras', default=None)
+        if not cameras:
+            return [{'id': 'default', 'url': self.config.config['camera']['default_url']}]
+        return [camera for camera in cameras if camera.get('enabled', True)]
+
+    def start(self):
+        if self.engine is None:
+            self.engine = OCREngine(self.config)
+        for camera in self.camera_configs():
+            self.add_camera(camera)
+        logging.info(f"Camera manager started with {len(self.pipelines)} cameras")
+
+    def add_camera(self, camera):
+        camera_id = str(camera['id'])
+        if camera_id in self.pipelines:
+            logging.warning(f"Camera {camera_id} is already running")
+            return self.pipelines[camera_id]
+        pipeline = CameraPipeline(camera, self.config, self.engine, self.alarms,
+                                  self.detections, self.history)
+        if self.save_text is not None:
+            pipeline.save_text = self.save_text
+        self.pipelines[camera_id] = pipeline.start()
+        return pipeline
+
+    def remove_camera(self, camera_id):
+        pipeline = self.pipelines.pop(str(camera_id), None)
+        if pipeline:
+            pipeline.stop()
+
+    def set_save_text(self, enabled):
+        """Turn text saving on/off for all cameras, overriding their config"""
+        self.save_text = bool(enabled)
+        for pipeline in self.pipelines.values():
+            pipeline.save_text = self.save_text
+
+    def set_alarm_words(self, words):
+        """Compile the new word list once; all pipelines share the dispatcher"""
+        self.alarms.set_words(words)
+
+    def stop(self):
+        for pipeline in self.pipelines.values():
+            pipeline.running = False
+        for camera_id in list(self.pipelines):
+            self.remove_camera(camera_id)
+        if self.engine and self.owns_engine:
+            self.engine.shutdown()
+            self.engine = None
+        if self.history and self.owns_history:
+            self.history.close()
+            self.history = None
+        logging.info("Camera manager stopped")
+
+    def stats(self):
+        cameras = {camera_id: pipeline.stats() for camera_id, pipeline in self.pipelines.items()}
+        return {
+            'cameras': cameras,
+            'recording_buffer_mb': round(sum(camera['recording'].get('buffer_mb', 0) for camera in cameras.values()
+                                             if camera['recording']), 2),
+            'ocr': self.engine.stats() if self.engine else None,
+            'alarms': self.alarms.stats(),
+            'detections': self.detections.stats(),
+            'history': self.history.stats() if self.history else None,
+            'text_log': self.text_writer.stats()
+        }
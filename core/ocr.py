@@ -0,0 +1,421 @@
+import logging
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from core.logs import log_limited
+from core.ocr_backends import get_backend
+from core.preprocessing import ImagePreprocessor, get_pipeline
+from core.roi import crop_regions
+
+
+class FrameChangeGate:
+    """Skips OCR for frames whose text areas look the same as in the last one sent to Tesseract.
+
+    The frame, or each configured ROI, is reduced to a grayscale grid of
+    about CELL x CELL pixel cells (at most 32x24 per area). A frame is
+    passed on when at least `ocr.change_detection.min_cells` cells differ
+    by `threshold` or more (0-255 scale) from the last submitted frame, or
+    when `max_interval` seconds have passed since the last submission. A
+    count of changed cells, not a frame-wide mean, so one new line of text
+    on an otherwise static frame is not averaged away.
+    `refresh` is True when the last frame was only passed on because of
+    max_interval; such frames bypass the OCR result cache.
+    """
+
+    GRID = (32, 24)
+    CELL = 8
+
+    def __init__(self, config):
+        self.enabled = config.get('ocr', 'change_detection', 'enabled', default=True)
+        self.threshold = float(config.get('ocr', 'change_detection', 'threshold', default=20.0))
+        self.min_cells = max(1, int(config.get('ocr', 'change_detection', 'min_cells', default=2)))
+        self.max_interval = float(config.get('ocr', 'change_detection', 'max_interval', default=5.0))
+        self.last_signature = None
+        self.last_submit_time = 0.0
+        self.last_changed = 0
+        self.refresh = False
+        self.submitted = 0
+        self.skipped = 0
+
+    @classmethod
+    def signature(cls, frame, regions=None, scale=1.0):
+        """Cell grids of the regions (x, y, w, h), or of the whole frame.
+
+        scale is the size of frame relative to the one regions refer to,
+        e.g. 1/8 for a JPEG decoded with cv2.IMREAD_REDUCED_GRAYSCALE_8.
+        """
+        if regions and scale != 1.0:
+            regions = [(int(x * scale), int(y * scale), max(1, round(w * scale)), max(1, round(h * scale)))
+                       for x, y, w, h in regions]
+        cell = max(1, round(cls.CELL * scale))
+        areas = crop_regions(frame, regions) if regions else [frame]
+        signature = []
+        for area in areas:
+            height, width = area.shape[:2]
+            size = (max(1, min(cls.GRID[0], width // cell)), max(1, min(cls.GRID[1], height // cell)))
+            small = cv2.resize(area, size, interpolation=cv2.INTER_AREA)
+            if small.ndim == 3:
+                small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            signature.append(small)
+        return signature
+
+    def changed_cells(self, signature):
+        """Cells that changed by at least threshold; None if the areas are not comparable"""
+        last = self.last_signature
+        if len(last) != len(signature) or any(a.shape != b.shape for a, b in zip(last, signature)):
+            return None
+        return sum(int(np.count_nonzero(cv2.absdiff(a, b) >= self.threshold)) for a, b in zip(last, signature))
+
+    def should_process(self, frame, captured_at=None, regions=None, scale=1.0):
+        """True if the frame should be OCR'd; regions limits the comparison to the ROIs"""
+        now = captured_at or time.time()
+        if not self.enabled:
+            self.submitted += 1
+            return True
+
+        signature = self.signature(frame, regions, scale)
+        self.refresh = self.last_signature is not None and now - self.last_submit_time >= self.max_interval
+        if self.last_signature is not None and not self.refresh:
+            changed = self.changed_cells(signature)
+            if changed is not None:
+                self.last_changed = changed
+                if changed < self.min_cells:
+                    self.skipped += 1
+                    return False
+
+        self.last_signature = signature
+        self.last_submit_time = now
+        self.submitted += 1
+        return True
+
+    def stats(self):
+        return {
+            'submitted': self.submitted,
+            'skipped': self.skipped,
+            'last_changed_cells': self.last_changed
+        }
+
+
+class OCRResultCache:
+    """Bounded LRU cache of OCR text for preprocessed images (whole frames or ROI crops).
+
+    Lookups go by a 64-bit difference hash and accept stored hashes within
+    `ocr.cache.max_distance` bits, so camera noise does not defeat the
+    cache. A candidate only hits when its stored quarter-size thumbnail has
+    the same shape and no pixel differs by more than `verify_threshold`
+    (0-255): a perceptual hash alone cannot tell two texts apart. Entries
+    older than `ttl` seconds are misses, so reappearing screens are re-read
+    now and then; frames the change gate forces (refresh) skip the cache.
+    """
+
+    THUMBNAIL_WIDTH = 160
+
+    def __init__(self, config):
+        enabled = config.get('ocr', 'cache', 'enabled', default=True)
+        self.capacity = int(config.get('ocr', 'cache', 'capacity', default=128)) if enabled else 0
+        self.max_distance = int(config.get('ocr', 'cache', 'max_distance', default=6))
+        self.verify_threshold = float(config.get('ocr', 'cache', 'verify_threshold', default=64))
+        self.ttl = float(config.get('ocr', 'cache', 'ttl', default=300.0))
+        self.entries = OrderedDict()  # hash -> (text, stored_at, thumbnail)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.evictions = 0
+        self.expired = 0
+
+    @classmethod
+    def key(cls, image):
+        """(64-bit dHash, thumbnail) of a grayscale image"""
+        small = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+        bits = small[:, 1:] > small[:, :-1]
+        height, width = image.shape[:2]
+        scale = min(0.25, cls.THUMBNAIL_WIDTH / width)
+        thumbnail = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        return int.from_bytes(np.packbits(bits).tobytes(), 'big'), thumbnail
+
+    def _verified(self, thumbnail, stored):
+        return (stored.shape == thumbnail.shape and
+                cv2.norm(thumbnail, stored, cv2.NORM_INF) <= self.verify_threshold)
+
+    def get(self, key):
+        if self.capacity <= 0:
+            return None
+
+        image_hash, thumbnail = key
+        now = time.monotonic()
+        with self.lock:
+            candidates = [image_hash] if image_hash in self.entries else []
+            if self.max_distance > 0:
+                candidates += [stored for stored in reversed(self.entries)
+                               if stored != image_hash and (stored ^ image_hash).bit_count() <= self.max_distance]
+
+            for stored in candidates:
+                text, stored_at, stored_thumbnail = self.entries[stored]
+                if self.ttl > 0 and now - stored_at > self.ttl:
+                    del self.entries[stored]
+                    self.expired += 1
+                    continue
+                if not self._verified(thumbnail, stored_thumbnail):
+                    self.rejected += 1
+                    continue
+                self.entries.move_to_end(stored)
+                self.hits += 1
+                return text
+
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        if self.capacity <= 0:
+            return
+
+        image_hash, thumbnail = key
+        with self.lock:
+            self.entries[image_hash] = (text, time.monotonic(), thumbnail)
+            self.entries.move_to_end(image_hash)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'rejected': self.rejected,
+                'evictions': self.evictions,
+                'expired': self.expired,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+# Process pool workers cannot share the engine's cache, each keeps its own
+_process_cache = None
+
+
+def run_ocr_job(images, config, cache=None, sources=None, refresh=False):
+    """Preprocess and OCR a list of images (runs inside a pool worker).
+
+    With refresh=True cached text is not used (but still updated).
+    """
+    global _process_cache
+    if cache is None:
+        if _process_cache is None:
+            _process_cache = OCRResultCache(config)
+        cache = _process_cache
+
+    backend = get_backend(config)
+    texts = []
+    for index, image in enumerate(images):
+        processed_frame = ImagePreprocessor.preprocess_image(image, config, sources[index] if sources else None)
+        key = OCRResultCache.key(processed_frame)
+        text = None if refresh else cache.get(key)
+        if text is None:
+            text = backend.image_to_string(processed_frame)
+            cache.put(key, text)
+        texts.append(text)
+    return texts
+
+
+class OCRJob:
+    """One submitted frame, possibly split into several region crops"""
+
+    def __init__(self, frame, captured_at, callback, regions=None, key=None, refresh=False):
+        self.key = key
+        self.refresh = refresh
+        self.frame = frame
+        self.captured_at = captured_at
+        self.callback = callback
+        self.regions = regions
+        self.texts = []
+        self.remaining = 0
+        self.error = None
+
+
+class OCREngine:
+    """Runs OCR jobs on a concurrent.futures pool fed by bounded queues.
+
+    At most `ocr.workers` frames are processed at once. Frames submitted
+    while every worker is busy wait in a per-source queue of
+    `ocr.queue_size` entries where a new frame pushes out the oldest pending
+    one, so a saturated pool always works on recent frames. Free workers
+    take pending frames from the sources in round-robin order, so one busy
+    camera cannot starve the others. A frame submitted with regions is OCR'd
+    crop by crop, either as one job or, with `ocr.roi.parallel`, one job
+    per crop.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.workers = max(1, int(config.get('ocr', 'workers', default=2)))
+        self.executor_type = config.get('ocr', 'executor', default='thread')
+        self.parallel_regions = config.get('ocr', 'roi', 'parallel', default=True)
+        self.region_padding = int(config.get('ocr', 'roi', 'padding', default=4))
+        self.queue_size = max(1, int(config.get('ocr', 'queue_size', default=1)))
+
+        if self.executor_type == 'process':
+            # Not fork: this process already runs capture/writer/logging threads whose
+            # locks a forked child could inherit while held
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                mp_context=multiprocessing.get_context('spawn'))
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                               thread_name_prefix='ocr')
+
+        # Only shared in thread mode; process workers use their own copy
+        self.cache = OCRResultCache(config) if self.executor_type != 'process' else None
+
+        self.lock = threading.Lock()
+        self.pending = OrderedDict()  # source key -> deque of OCRJob, in round-robin order
+        self.in_flight = 0
+        self.closed = False
+        self.submitted = 0
+        self.replaced = 0
+        self.completed = 0
+        self.failed = 0
+        logging.info(f"OCR engine started with {self.workers} {self.executor_type} workers")
+
+    def submit(self, frame, captured_at, callback, regions=None, key=None, refresh=False):
+        """Queue a frame for OCR; callback(text, captured_at) runs when it completes.
+
+        If regions (x, y, w, h) are given only those crops are OCR'd and
+        their texts are joined line by line in region order. key identifies
+        the source (camera) for fair scheduling. refresh=True skips the
+        result cache (see FrameChangeGate.refresh).
+        """
+        job = OCRJob(frame, captured_at, callback, regions, key, refresh)
+        with self.lock:
+            if self.closed:
+                return False
+            self.submitted += 1
+            if self.in_flight >= self.workers:
+                queue = self.pending.get(key)
+                if queue is None:
+                    queue = self.pending[key] = deque(maxlen=self.queue_size)
+                if len(queue) == queue.maxlen:
+                    self.replaced += 1
+                queue.append(job)
+                return True
+            self.in_flight += 1
+
+        self._start_job(job)
+        return True
+
+    def _start_job(self, job):
+        """Hand the job's image groups to the pool; failures finish the job so its slot is freed"""
+        try:
+            if job.regions:
+                images = crop_regions(job.frame, job.regions, self.region_padding)
+            else:
+                images = [job.frame]
+            # (camera, region index) per image, e.g. for temporal denoising
+            sources = [(job.key, index) for index in range(len(images))]
+            if self.parallel_regions:
+                groups = [([image], [source]) for image, source in zip(images, sources)]
+            else:
+                groups = [(images, sources)]
+        except Exception as e:
+            groups = []
+            job.error = f"could not prepare regions {job.regions}: {str(e)}"
+        job.texts = [None] * len(groups)
+        job.remaining = len(groups)
+        job.frame = None
+
+        if not groups:
+            self._finish_job(job)
+            return
+
+        for index, (group, group_sources) in enumerate(groups):
+            try:
+                future = self.executor.submit(run_ocr_job, group, self.config, self.cache,
+                                              group_sources, job.refresh)
+            except Exception as e:
+                # Executor already shut down; the groups never submitted count as done
+                job.error = str(e) or type(e).__name__
+                with self.lock:
+                    job.remaining -= len(groups) - index
+                    done = job.remaining <= 0
+                if done:
+                    self._finish_job(job)
+                return
+            future.add_done_callback(lambda f, i=index: self._group_done(f, job, i))
+
+    def _group_done(self, future, job, index):
+        try:
+            if future.cancelled():
+                job.error = "cancelled"
+            else:
+                job.texts[index] = "\n".join(t.strip() for t in future.result() if t.strip())
+        except Exception as e:
+            job.error = str(e)
+
+        with self.lock:
+            job.remaining -= 1
+            if job.remaining > 0:
+                return
+        self._finish_job(job)
+
+    def _finish_job(self, job):
+        try:
+            if job.error:
+                with self.lock:
+                    self.failed += 1
+                log_limited('ocr_job_failed', logging.ERROR, "OCR job failed: %s", job.error)
+            else:
+                with self.lock:
+                    self.completed += 1
+                job.callback("\n".join(t for t in job.texts if t), job.captured_at)
+        except Exception as e:
+            log_limited('ocr_result_error', logging.ERROR, "Error handling OCR result: %s", e)
+        finally:
+            with self.lock:
+                next_job = None if self.closed else self._next_pending()
+                if next_job is None:
+                    self.in_flight -= 1
+            if next_job:
+                self._start_job(next_job)
+
+    def _next_pending(self):
+        """Oldest job of the next source in turn (lock must be held)"""
+        if not self.pending:
+            return None
+        key, queue = next(iter(self.pending.items()))
+        job = queue.popleft()
+        if queue:
+            self.pending.move_to_end(key)
+        else:
+            del self.pending[key]
+        return job
+
+    def stats(self):
+        with self.lock:
+            return {
+                'workers': self.workers,
+                'in_flight': self.in_flight,
+                'pending': sum(len(queue) for queue in self.pending.values()),
+                'submitted': self.submitted,
+                'replaced': self.replaced,
+                'completed': self.completed,
+                'failed': self.failed,
+                'cache': self.cache.stats() if self.cache else None,
+                # Stage timings live in the worker processes with the process executor
+                'preprocessing': get_pipeline(self.config).stats() if self.executor_type != 'process' else None
+            }
+
+    def shutdown(self, wait=False):
+        with self.lock:
+            self.closed = True
+            self.pending.clear()
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+        logging.info(f"OCR engine stopped: {self.stats()}")
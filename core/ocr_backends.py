@@ -0,0 +1,101 @@
+import logging
+import os
+import threading
+
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:  # optional, pytesseract is the fallback
+    tesserocr = None
+
+
+class PytesseractBackend:
+    """Runs the tesseract binary once per image (subprocess + temp files)"""
+
+    name = 'pytesseract'
+
+    def __init__(self, config):
+        tesseract_path = config.get('ocr', 'tesseract_path')
+        if tesseract_path and os.path.exists(tesseract_path):
+            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+        self.language = config.get('ocr', 'language', default='eng')
+
+    def image_to_string(self, image):
+        return pytesseract.image_to_string(image, lang=self.language)
+
+
+class TesserocrBackend:
+    """Keeps a libtesseract API loaded and feeds it raw pixel buffers.
+
+    Language data is loaded once per thread (a PyTessBaseAPI instance must
+    not be shared between threads) and reused for every following image.
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self, config):
+        if tesserocr is None:
+            raise ImportError("tesserocr is not installed")
+        self.language = config.get('ocr', 'language', default='eng')
+        self.local = threading.local()
+        self.apis = []
+        self.lock = threading.Lock()
+
+    def _api(self):
+        api = getattr(self.local, 'api', None)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=self.language)
+            self.local.api = api
+            with self.lock:
+                self.apis.append(api)
+        return api
+
+    def image_to_string(self, image):
+        api = self._api()
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        if not image.flags['C_CONTIGUOUS']:
+            image = image.copy()
+        api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+        return api.GetUTF8Text()
+
+    def close(self):
+        with self.lock:
+            for api in self.apis:
+                api.End()
+            self.apis.clear()
+
+
+BACKENDS = {
+    PytesseractBackend.name: PytesseractBackend,
+    TesserocrBackend.name: TesserocrBackend
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(config, name=None):
+    """Instantiate the configured OCR backend, falling back to pytesseract"""
+    name = name or config.get('ocr', 'backend', default='pytesseract')
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        logging.warning(f"Unknown OCR backend '{name}', using pytesseract")
+        backend_class = PytesseractBackend
+    try:
+        return backend_class(config)
+    except Exception as e:
+        logging.warning(f"OCR backend '{name}' unavailable ({str(e)}), using pytesseract")
+        return PytesseractBackend(config)
+
+
+def get_backend(config):
+    """Process-wide backend instance, created on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(config)
+                logging.info(f"OCR backend: {_backend.name}")
+    return _backend
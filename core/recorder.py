@@ -0,0 +1,395 @@
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from threading import Condition, Lock, Thread
+
+import cv2
+import numpy as np
+
+from core.codecs import open_writer, select_codec
+from core.logs import log_limited
+
+
+class FrameRingBuffer:
+    """Preallocated ring of frames for the pre-alarm window and writer backlog.
+
+    All slots live in one contiguous uint8 array of shape
+    [capacity, height, width, 3] allocated up front; frames are copied (or
+    resized) straight into the next slot, so the capture loop never
+    allocates. Every frame gets a sequence number; capture timestamps are
+    kept in a parallel array.
+    """
+
+    def __init__(self, capacity, width, height):
+        self.capacity = max(1, int(capacity))
+        self.frames = np.empty((self.capacity, height, width, 3), dtype=np.uint8)
+        self.timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self.total = 0  # frames appended so far = sequence number of the next frame
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes + self.timestamps.nbytes
+
+    @property
+    def oldest_seq(self):
+        return max(0, self.total - self.capacity)
+
+    @property
+    def full(self):
+        """True when the next append overwrites the frame at oldest_seq"""
+        return self.total >= self.capacity
+
+    def append(self, frame, timestamp=None):
+        """Store a frame in the next slot and return its sequence number"""
+        index = self.total % self.capacity
+        slot = self.frames[index]
+        if frame.shape == slot.shape:
+            np.copyto(slot, frame)
+        else:
+            cv2.resize(frame, (slot.shape[1], slot.shape[0]), dst=slot)
+        self.timestamps[index] = timestamp or time.time()
+        self.total += 1
+        return self.total - 1
+
+    def get(self, seq):
+        """View of the frame with this sequence number, or None if overwritten"""
+        if self.oldest_seq <= seq < self.total:
+            return self.frames[seq % self.capacity]
+        return None
+
+    def take(self, seq, out):
+        """Copy a frame out of the ring (cheap, done under the recorder lock)"""
+        np.copyto(out, self.frames[seq % self.capacity])
+        return out
+
+    def decode(self, taken):
+        return taken
+
+    def ordered_timestamps(self):
+        start, end = self.oldest_seq % self.capacity, self.total % self.capacity
+        if self.total <= self.capacity:
+            return self.timestamps[:self.total]
+        return np.concatenate((self.timestamps[start:], self.timestamps[:end]))
+
+
+class EncodedFrameBuffer:
+    """Pre-alarm buffer holding JPEG encoded frames within a memory budget.
+
+    A 640x480 JPEG is ~30-60 KB instead of 900 KB raw, so minutes of
+    pre-roll fit where seconds did before. Frames are encoded on append and
+    decoded by the writer thread on flush; the oldest frames are evicted
+    once `budget` bytes or `max_frames` frames are exceeded. Same sequence
+    interface as FrameRingBuffer.
+    """
+
+    def __init__(self, budget, max_frames, quality=85):
+        self.budget = int(budget)
+        self.capacity = max(1, int(max_frames))
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)]
+        self.frames = deque()  # (jpeg bytes, timestamp)
+        self.total = 0
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def oldest_seq(self):
+        return self.total - len(self.frames)
+
+    @property
+    def full(self):
+        # Assume the next frame is about as large as the average one
+        average = self.nbytes // len(self.frames) if self.frames else 0
+        return len(self.frames) >= self.capacity or self.nbytes + average > self.budget
+
+    def encode(self, frame):
+        # Kept at the camera's resolution, the writer thread resizes on flush
+        ok, data = cv2.imencode('.jpg', frame, self.params)
+        return data.tobytes() if ok else None
+
+    def append(self, frame, timestamp=None):
+        """Store an encoded frame (see encode) and return its sequence number"""
+        self.frames.append((frame, timestamp or time.time()))
+        self.nbytes += len(frame)
+        self.total += 1
+        while len(self.frames) > self.capacity or (self.nbytes > self.budget and len(self.frames) > 1):
+            data, _ = self.frames.popleft()
+            self.nbytes -= len(data)
+        return self.total - 1
+
+    def get(self, seq):
+        if self.oldest_seq <= seq < self.total:
+            return self.frames[seq - self.oldest_seq][0]
+        return None
+
+    def take(self, seq, out):
+        return self.get(seq)
+
+    def decode(self, taken):
+        return cv2.imdecode(np.frombuffer(taken, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    def ordered_timestamps(self):
+        return np.array([timestamp for _, timestamp in self.frames], dtype=np.float64)
+
+
+class VideoRecorder:
+    """Alarm recorder with a pre-alarm buffer and a background writer thread.
+
+    Frames are only copied into the ring buffer on the caller's thread; a
+    dedicated thread encodes them, starting with the pre-alarm window when
+    a recording starts. The part of the ring beyond the pre-alarm window
+    (`recording.writer_queue` frames) is the writer's backlog. When the
+    writer falls that far behind, `recording.overflow_policy` decides:
+    'block' waits for the writer, 'drop_oldest' skips the oldest unwritten
+    frame, 'drop_newest' discards the incoming one.
+    """
+
+    OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+    def __init__(self, config, name=None):
+        self.config = config
+        self.name = name
+        self.recording = False
+        self.writer = None
+        self.pre_alarm_frames = int(config.config['recording']['pre_alarm_duration'] *
+                                    config.config['recording']['fps'])
+        self.queue_size = int(config.get('recording', 'writer_queue',
+                                         default=config.config['recording']['fps'] * 2))
+        self.overflow_policy = config.get('recording', 'overflow_policy', default='drop_oldest')
+        if self.overflow_policy not in self.OVERFLOW_POLICIES:
+            logging.warning(f"Unknown overflow policy '{self.overflow_policy}', using drop_oldest")
+            self.overflow_policy = 'drop_oldest'
+        width = config.config['recording']['resolution']['width']
+        height = config.config['recording']['resolution']['height']
+        self.size = (width, height)
+        self.codec = None
+        self.disabled = False  # no working codec
+        if config.config['recording']['enabled']:
+            # Probed here so a missing codec shows up at startup, not at the first alarm
+            self.ensure_codec()
+        self.buffer_mode = config.get('recording', 'buffer', 'mode', default='raw')
+        if self.buffer_mode == 'jpeg':
+            # Pre-roll is bounded by pre_alarm_duration and by the memory budget
+            self.frame_buffer = EncodedFrameBuffer(
+                float(config.get('recording', 'buffer', 'memory_mb', default=64)) * 1024 * 1024,
+                self.pre_alarm_frames + self.queue_size,
+                quality=config.get('recording', 'buffer', 'jpeg_quality', default=85))
+        else:
+            self.buffer_mode = 'raw'
+            # Slots have the recording size; frames are resized straight into them
+            self.frame_buffer = FrameRingBuffer(self.pre_alarm_frames + self.queue_size, width, height)
+
+        self.lock = Condition(Lock())
+        self.next_write = 0     # sequence number the writer thread encodes next
+        self.stop_at = None     # end of the backlog once recording stopped
+        # [writer, first seq, stop seq] of a recording started while the
+        # previous one still drains; the writer thread switches to it
+        self.pending = None
+        self.closed = False
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.max_queue_depth = 0
+
+        self._setup_output_dir()
+        self.writer_thread = Thread(target=self._writer_loop, daemon=True,
+                                    name=f"VideoWriter-{name or 'main'}")
+        self.writer_thread.start()
+        logging.info(f"VideoRecorder initialized ({self.buffer_mode} pre-alarm buffer, "
+                     f"{self.frame_buffer.nbytes / 1e6:.1f} MB allocated)")
+    
+    def ensure_codec(self):
+        """Codec for new recordings, probed on first use; None disables recording"""
+        if self.codec is None and not self.disabled:
+            try:
+                self.codec = select_codec(self.config)
+            except RuntimeError as e:
+                self.disabled = True
+                logging.error(f"Recording disabled: {str(e)}")
+        return self.codec
+
+    def _setup_output_dir(self):
+        out_dir = self.config.config['recording']['output_directory']
+        if not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+
+    def _backlog_end(self):
+        """Sequence number after the last frame the writer must encode (lock held)"""
+        if self.writer is None:
+            return self.next_write
+        if self.recording and self.pending is None:
+            return self.frame_buffer.total
+        return self.stop_at
+
+    def queue_depth(self):
+        with self.lock:
+            return self._backlog_end() - self.next_write
+    
+    def add_frame(self, frame, timestamp=None):
+        if frame is None:
+            return
+        if self.buffer_mode == 'jpeg':
+            # Encode before taking the lock so the writer thread is not held up
+            frame = self.frame_buffer.encode(frame)
+            if frame is None:
+                return
+
+        with self.lock:
+            # When full, the next append evicts oldest_seq; it must not be unwritten
+            while (self.writer is not None and self.frame_buffer.full and
+                   self.next_write <= self.frame_buffer.oldest_seq < self._backlog_end()):
+                if self.overflow_policy == 'drop_newest':
+                    self.frames_dropped += 1
+                    return
+                if self.overflow_policy == 'drop_oldest':
+                    self.next_write += 1
+                    self.frames_dropped += 1
+                    continue
+                self.lock.wait(timeout=1.0)
+
+            self.frame_buffer.append(frame, timestamp)
+            if self.writer is not None:
+                self.max_queue_depth = max(self.max_queue_depth, self._backlog_end() - self.next_write)
+                self.lock.notify_all()
+
+    def _writer_loop(self):
+        # The frame being encoded is taken out of the buffer, so capture can
+        # overwrite its slot meanwhile
+        scratch = np.empty_like(self.frame_buffer.frames[0]) if self.buffer_mode == 'raw' else None
+        while True:
+            finished_writer = None
+            with self.lock:
+                while True:
+                    if self.writer is not None and self.next_write < self._backlog_end():
+                        break
+                    if self.writer is not None and (self.pending is not None or not self.recording):
+                        # Backlog drained after stop_recording; go on with a queued recording
+                        finished_writer, self.writer = self.writer, None
+                        if self.pending is not None:
+                            self.writer, start, self.stop_at = self.pending
+                            self.next_write = max(self.frame_buffer.oldest_seq, start)
+                            self.pending = None
+                        self.lock.notify_all()
+                        break
+                    if self.closed:
+                        return
+                    self.lock.wait()
+
+                if finished_writer is None:
+                    taken = None
+                    if self.next_write >= self.frame_buffer.oldest_seq:
+                        taken = self.frame_buffer.take(self.next_write, scratch)
+                    else:
+                        self.frames_dropped += 1  # evicted by the memory budget
+                    self.next_write += 1
+                    writer = self.writer
+                    self.lock.notify_all()
+
+            if finished_writer is not None:
+                finished_writer.release()
+                logging.info(f"Recording finished: {self.stats()}")
+                continue
+
+            if taken is None:
+                continue
+            try:
+                frame = self.frame_buffer.decode(taken)
+                # OpenCV silently skips frames that do not match the writer size
+                if (frame.shape[1], frame.shape[0]) != self.size:
+                    frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+                writer.write(frame)
+                self.frames_written += 1
+            except Exception as e:
+                log_limited(('recorder_write', self.name), logging.ERROR, "Error writing video frame: %s", e)
+    
+    def start_recording(self):
+        """Open the next file and return; never waits for a previous recording"""
+        if self.ensure_codec() is None:
+            return
+        with self.lock:
+            if self.recording:
+                logging.info("Recording already in progress")
+                return
+            if self.pending is not None:
+                # Restarted before the queued recording began: keep extending it
+                self.pending[2] = None
+                self.recording = True
+                return
+
+        writer = None
+        try:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            prefix = f'alarm_recording_{self.name}' if self.name else 'alarm_recording'
+            writer, filename = open_writer(
+                os.path.join(self.config.config['recording']['output_directory'], f'{prefix}_{timestamp}'),
+                self.codec,
+                self.config.config['recording']['fps'],
+                self.size
+            )
+            
+            if not writer.isOpened():
+                raise Exception("Failed to create video writer")
+            
+            # The writer thread starts with the pre-alarm buffer, after
+            # draining the previous recording if that is still running
+            with self.lock:
+                start = max(self.frame_buffer.oldest_seq, self.frame_buffer.total - self.pre_alarm_frames)
+                if self.writer is None:
+                    self.writer = writer
+                    self.next_write = start
+                    self.stop_at = None
+                else:
+                    self.pending = [writer, start, None]
+                self.recording = True
+                self.lock.notify_all()
+            logging.info(f"Started recording to {filename}")
+            
+        except Exception as e:
+            self.recording = False
+            if writer:
+                writer.release()
+            logging.error(f"Error starting recording: {str(e)}")
+            raise
+    
+    def stop_recording(self):
+        if not self.recording:
+            return
+        
+        # The writer thread finishes the backlog and releases the file
+        with self.lock:
+            self.recording = False
+            if self.pending is not None:
+                self.pending[2] = self.frame_buffer.total
+            else:
+                self.stop_at = self.frame_buffer.total
+            self.lock.notify_all()
+        logging.info("Stopped recording")
+
+    def close(self, timeout=10.0):
+        """Stop recording, let the writer drain and end the writer thread"""
+        self.stop_recording()
+        with self.lock:
+            self.closed = True
+            self.lock.notify_all()
+        self.writer_thread.join(timeout)
+
+    def stats(self):
+        with self.lock:
+            timestamps = self.frame_buffer.ordered_timestamps()
+            return {
+                'recording': self.recording,
+                'codec': self.codec,
+                'buffer_mode': self.buffer_mode,
+                'buffered_frames': len(self.frame_buffer),
+                'buffered_seconds': round(float(timestamps[-1] - timestamps[0]), 1) if len(timestamps) > 1 else 0.0,
+                'queue_depth': self._backlog_end() - self.next_write,
+                'max_queue_depth': self.max_queue_depth,
+                'frames_written': self.frames_written,
+                'frames_dropped': self.frames_dropped,
+                'buffer_mb': round(self.frame_buffer.nbytes / 1e6, 2)
+            }
@@ -0,0 +1,100 @@
+import logging
+
+import cv2
+
+
+def valid_regions(regions, camera=None):
+    """(x, y, w, h) int tuples of the well-formed regions; others are logged and skipped"""
+    valid = []
+    for region in regions or []:
+        try:
+            x, y, w, h = (int(round(float(v))) for v in region)
+        except (TypeError, ValueError):
+            logging.warning(f"Ignoring malformed ROI for {camera}: {region!r}")
+            continue
+        if w <= 0 or h <= 0:
+            logging.warning(f"Ignoring empty ROI for {camera}: {region!r}")
+            continue
+        valid.append((x, y, w, h))
+    return valid
+
+
+def get_rois(config, camera):
+    """Configured ROI rectangles (x, y, w, h) for a camera, in frame pixels"""
+    regions = config.get('ocr', 'roi', 'regions', default={}) or {}
+    return valid_regions(regions.get(camera, []), camera)
+
+
+def set_rois(config, camera, rois):
+    roi_config = config.config['ocr'].setdefault('roi', {})
+    regions = roi_config.get('regions') or {}
+    if rois:
+        regions[camera] = [list(region) for region in rois]
+    else:
+        regions.pop(camera, None)
+    roi_config['regions'] = regions
+
+
+def clip_region(region, shape, padding=0):
+    """Clip (x, y, w, h) plus padding to the frame; None if nothing is left"""
+    x, y, w, h = region
+    frame_h, frame_w = shape[:2]
+    x0 = max(0, x - padding)
+    y0 = max(0, y - padding)
+    x1 = min(frame_w, x + w + padding)
+    y1 = min(frame_h, y + h + padding)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def crop_regions(frame, regions, padding=0):
+    """Crops of the frame for each region (views, not copies)"""
+    crops = []
+    for region in regions:
+        clipped = clip_region(region, frame.shape, padding)
+        if clipped is None:
+            continue
+        x, y, w, h = clipped
+        crops.append(frame[y:y + h, x:x + w])
+    return crops
+
+
+class TextRegionDetector:
+    """Proposes text-like regions with a morphological gradient.
+
+    Used when a camera has no configured ROI. Strong local gradients are
+    binarized, joined horizontally into text lines and kept when the box is
+    large and dense enough. Runs on a half-size frame to stay cheap.
+    """
+
+    def __init__(self, config):
+        self.max_regions = int(config.get('ocr', 'roi', 'max_regions', default=8))
+        self.min_width = int(config.get('ocr', 'roi', 'min_width', default=24))
+        self.min_height = int(config.get('ocr', 'roi', 'min_height', default=8))
+        self.gradient_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self.line_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1))
+
+    def detect(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        small = cv2.pyrDown(gray)
+
+        gradient = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, self.gradient_kernel)
+        _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        lines = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self.line_kernel)
+        contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        regions = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * 2 < self.min_width or h * 2 < self.min_height or w < h:
+                continue
+            if cv2.countNonZero(binary[y:y + h, x:x + w]) < 0.45 * w * h:
+                continue
+            regions.append((x * 2, y * 2, w * 2, h * 2))
+
+        # Keep the largest boxes, then OCR them in reading order
+        regions.sort(key=lambda r: r[2] * r[3], reverse=True)
+        regions = regions[:self.max_regions]
+        regions.sort(key=lambda r: (r[1], r[0]))
+        return regions
@@ -0,0 +1,240 @@
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+from datetime import datetime
+
+import cv2
+
+from core.logs import log_limited
+
+# One entry per frame in a segment's .idx file: timestamp, byte offset, length
+FRAME_ENTRY = struct.Struct('<dQI')
+INDEX_FILE = 'index.jsonl'
+
+
+def read_index(directory):
+    """Finished segments of a camera, oldest first"""
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    segments = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                segments.append(json.loads(line))
+    return segments
+
+
+def read_frame_index(path):
+    """(timestamp, offset, length) for every complete frame entry of a segment"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    usable = len(data) - len(data) % FRAME_ENTRY.size
+    return list(FRAME_ENTRY.iter_unpack(data[:usable]))
+
+
+def _copy_range(source, destination, offset, length, chunk_size=1 << 20):
+    with open(source, 'rb') as f:
+        f.seek(offset)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            destination.write(chunk)
+            length -= len(chunk)
+
+
+def extract_clip(directory, start, end, output, segments=None):
+    """Write the frames between two timestamps into one MJPEG file.
+
+    JPEG frames are copied byte for byte from the overlapping segments, so
+    nothing is decoded or re-encoded. Returns the number of frames written.
+    """
+    if segments is None:
+        segments = read_index(directory)
+    frames = 0
+    with open(output, 'wb') as out:
+        for segment in segments:
+            if segment['end'] < start or segment['start'] > end:
+                continue
+            entries = [entry for entry in read_frame_index(os.path.join(directory, segment['index']))
+                       if start <= entry[0] <= end]
+            if not entries:
+                continue
+            first, last = entries[0], entries[-1]
+            # Frames of a segment are contiguous, one range covers the window
+            _copy_range(os.path.join(directory, segment['file']), out,
+                        first[1], last[1] + last[2] - first[1])
+            frames += len(entries)
+    return frames
+
+
+class SegmentRecorder:
+    """Continuous recording into fixed-length MJPEG segments.
+
+    Every frame is JPEG encoded on a writer thread and appended to the
+    current `<name>_<start>.mjpeg` segment; a sidecar `.idx` file keeps
+    (timestamp, offset, length) per frame and `index.jsonl` gets one line
+    per finished segment. Concatenated JPEGs form a valid MJPEG stream, so
+    alarm clips are extracted for any time window without re-encoding.
+    JPEGs from an MJPEG camera (add_encoded) are stored without decoding
+    or re-encoding at the camera's own resolution.
+    """
+
+    def __init__(self, config, name=None):
+        self.config = config
+        self.name = name or 'camera'
+        self.directory = os.path.join(config.config['recording']['output_directory'], 'segments', self.name)
+        self.segment_duration = float(config.get('recording', 'continuous', 'segment_duration', default=60))
+        self.retention = float(config.get('recording', 'continuous', 'retention_hours', default=24)) * 3600
+        self.size = (config.config['recording']['resolution']['width'],
+                     config.config['recording']['resolution']['height'])
+        quality = config.get('recording', 'continuous', 'jpeg_quality', default=85)
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)]
+
+        self.queue = queue.Queue(maxsize=int(config.get('recording', 'writer_queue', default=40)))
+        self.lock = threading.Lock()  # guards the open segment
+        self.segment = None
+        self.data_file = None
+        self.index_file = None
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.segments_written = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"Segments-{self.name}", daemon=True)
+        self.thread.start()
+        logging.info(f"Continuous recording to {self.directory} ({self.segment_duration:.0f}s segments)")
+
+    def add_frame(self, frame, timestamp=None):
+        """Queue a frame for the writer thread; drops it if the writer is behind"""
+        if frame is None or not self.running:
+            return
+        try:
+            self.queue.put_nowait((frame, timestamp or time.time()))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def add_encoded(self, data, timestamp=None):
+        """Queue an already encoded JPEG, stored as-is (MJPEG passthrough)"""
+        self.add_frame(data, timestamp)
+
+    def _run(self):
+        while self.running or not self.queue.empty():
+            try:
+                frame, timestamp = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                if isinstance(frame, bytes):
+                    self._write(frame, timestamp)
+                    continue
+                if (frame.shape[1], frame.shape[0]) != self.size:
+                    frame = cv2.resize(frame, self.size)
+                ok, data = cv2.imencode('.jpg', frame, self.params)
+                if ok:
+                    self._write(data.tobytes(), timestamp)
+            except Exception as e:
+                log_limited(('segment_write', self.name), logging.ERROR, "[%s] Error writing segment frame: %s",
+                            self.name, e)
+            finally:
+                self.queue.task_done()
+
+        with self.lock:
+            self._close_segment()
+
+    def _write(self, data, timestamp):
+        with self.lock:
+            if self.segment is None or timestamp >= self.segment['start'] + self.segment_duration:
+                self._close_segment()
+                self._open_segment(timestamp)
+            segment = self.segment
+            self.data_file.write(data)
+            self.index_file.write(FRAME_ENTRY.pack(timestamp, segment['bytes'], len(data)))
+            segment['bytes'] += len(data)
+            segment['frames'] += 1
+            segment['end'] = timestamp
+            self.frames_written += 1
+
+    def _open_segment(self, timestamp):
+        base = f"{self.name}_{datetime.fromtimestamp(timestamp).strftime('%Y%m%d_%H%M%S')}"
+        self.segment = {
+            'file': f"{base}.mjpeg",
+            'index': f"{base}.idx",
+            'start': timestamp,
+            'end': timestamp,
+            'frames': 0,
+            'bytes': 0
+        }
+        self.data_file = open(os.path.join(self.directory, self.segment['file']), 'wb')
+        self.index_file = open(os.path.join(self.directory, self.segment['index']), 'wb')
+
+    def _close_segment(self):
+        """Finish the open segment and record it in index.jsonl (lock held)"""
+        if self.segment is None:
+            return
+        self.data_file.close()
+        self.index_file.close()
+        with open(os.path.join(self.directory, INDEX_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.segment) + '\n')
+        self.segments_written += 1
+        self.segment = self.data_file = self.index_file = None
+        if self.retention > 0:
+            self._prune(time.time() - self.retention)
+
+    def _prune(self, before):
+        """Delete segments that ended before the retention window"""
+        segments = read_index(self.directory)
+        keep = [segment for segment in segments if segment['end'] >= before]
+        if len(keep) == len(segments):
+            return
+        for segment in segments:
+            if segment['end'] < before:
+                for key in ('file', 'index'):
+                    try:
+                        os.remove(os.path.join(self.directory, segment[key]))
+                    except OSError:
+                        pass
+        tmp_file = os.path.join(self.directory, f"{INDEX_FILE}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for segment in keep:
+                f.write(json.dumps(segment) + '\n')
+        os.replace(tmp_file, os.path.join(self.directory, INDEX_FILE))
+
+    def extract_clip(self, start, end, output=None):
+        """Extract [start, end] (epoch seconds), including the open segment"""
+        self.queue.join()  # frames up to now are on disk
+        with self.lock:
+            segments = read_index(self.directory)
+            if self.segment is not None:
+                self.data_file.flush()
+                self.index_file.flush()
+                segments.append(dict(self.segment))
+
+        if output is None:
+            stamp = datetime.fromtimestamp(start).strftime('%Y%m%d_%H%M%S')
+            output = os.path.join(self.config.config['recording']['output_directory'],
+                                  f"alarm_clip_{self.name}_{stamp}.mjpeg")
+        frames = extract_clip(self.directory, start, end, output, segments)
+        logging.info(f"[{self.name}] Extracted {frames} frames to {output}")
+        return output
+
+    def close(self, timeout=10.0):
+        self.running = False
+        self.thread.join(timeout)
+
+    def stats(self):
+        return {
+            'mode': 'continuous',
+            'queue_depth': self.queue.qsize(),
+            'frames_written': self.frames_written,
+            'frames_dropped': self.frames_dropped,
+            'segments_written': self.segments_written,
+            'buffer_mb': 0.0
+        }
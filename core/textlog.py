@@ -0,0 +1,153 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+FSYNC_POLICIES = ('never', 'flush', 'periodic')
+
+
+class TextLogWriter:
+    """Appends detected text lines to daily files from a background thread.
+
+    write() only queues the line. The writer keeps every file open, collects
+    lines in memory and writes them with one write() call when
+    `buffer_lines` lines are pending or `flush_interval` seconds passed.
+    `fsync` decides when the data is forced to disk: never (left to the
+    OS), after every flush, or periodically (every `fsync_interval` s).
+    Files switch at midnight and, with `max_mb`, continue in
+    <prefix>_<date>_1.txt, _2.txt ... once they reach that size.
+    """
+
+    def __init__(self, flush_interval=1.0, buffer_lines=200, fsync='never', fsync_interval=10.0, max_mb=0):
+        if fsync not in FSYNC_POLICIES:
+            logging.warning(f"Unknown fsync policy '{fsync}', using 'never'")
+            fsync = 'never'
+        self.flush_interval = float(flush_interval)
+        self.buffer_lines = max(1, int(buffer_lines))
+        self.fsync = fsync
+        self.fsync_interval = float(fsync_interval)
+        self.max_bytes = int(float(max_mb or 0) * 1024 * 1024)
+        self.queue = queue.SimpleQueue()
+        self.files = {}  # (save_dir, prefix) -> [file, day, part, size]
+        self.lines_written = 0
+        self.flushes = 0
+        self.last_fsync = time.monotonic()
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="TextLogWriter", daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(flush_interval=config.get('ocr', 'text_log', 'flush_interval', default=1.0),
+                   buffer_lines=config.get('ocr', 'text_log', 'buffer_lines', default=200),
+                   fsync=config.get('ocr', 'text_log', 'fsync', default='never'),
+                   fsync_interval=config.get('ocr', 'text_log', 'fsync_interval', default=10.0),
+                   max_mb=config.get('ocr', 'text_log', 'max_mb', default=0))
+
+    def write(self, text, detected_time=None, save_dir="detected_texts", prefix="ocr_text"):
+        timestamp = detected_time or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.queue.put((save_dir, prefix, f"[{timestamp}] {text.strip()}\n"))
+
+    def _run(self):
+        pending = {}
+        count = 0
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is not None:
+                pending.setdefault(item[:2], []).append(item[2])
+                count += 1
+            stopping = not self.running and self.queue.empty()
+            if count >= self.buffer_lines or time.monotonic() >= deadline or stopping:
+                if pending:
+                    self._flush(pending)
+                    pending, count = {}, 0
+                deadline = time.monotonic() + self.flush_interval
+            if stopping:
+                break
+        for entry in self.files.values():
+            entry[0].close()
+        self.files.clear()
+
+    def _flush(self, pending):
+        now = time.monotonic()
+        sync = self.fsync == 'flush' or (self.fsync == 'periodic' and now - self.last_fsync >= self.fsync_interval)
+        for key, lines in pending.items():
+            try:
+                entry = self._file(key)
+                data = ''.join(lines)
+                entry[0].write(data)
+                entry[0].flush()
+                if sync:
+                    os.fsync(entry[0].fileno())
+                entry[3] += len(data.encode('utf-8'))
+                self.lines_written += len(lines)
+            except OSError as e:
+                logging.error(f"Failed to save detected text: {str(e)}")
+        self.flushes += 1
+        if sync:
+            self.last_fsync = now
+
+    def _file(self, key):
+        """Open file for (save_dir, prefix), switched at midnight or when full"""
+        day = datetime.now().strftime('%Y%m%d')
+        entry = self.files.get(key)
+        if entry and entry[1] == day and not (self.max_bytes and entry[3] >= self.max_bytes):
+            return entry
+
+        save_dir, prefix = key
+        part = entry[2] + 1 if entry and entry[1] == day else 0
+        if entry:
+            entry[0].close()
+        os.makedirs(save_dir, exist_ok=True)
+        while True:
+            name = f"{prefix}_{day}.txt" if part == 0 else f"{prefix}_{day}_{part}.txt"
+            filename = os.path.join(save_dir, name)
+            size = os.path.getsize(filename) if os.path.exists(filename) else 0
+            if not self.max_bytes or size < self.max_bytes:
+                break
+            part += 1
+        entry = self.files[key] = [open(filename, 'a', encoding='utf-8'), day, part, size]
+        logging.info(f"Saving detected text to {filename}")
+        return entry
+
+    def close(self, timeout=5.0):
+        self.running = False
+        self.thread.join(timeout)
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.lines_written,
+            'flushes': self.flushes,
+            'open_files': len(self.files)
+        }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_text_writer(config=None):
+    """Shared writer; settings come from the config of the first call"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = TextLogWriter.from_config(config) if config is not None else TextLogWriter()
+            # Pending lines are written when the interpreter exits
+            atexit.register(_writer.close)
+        return _writer
+
+
+def save_detected_text(text, detected_time=None, save_dir="detected_texts", prefix="ocr_text"):
+    """OCR ile tespit edilen metni dosyaya kaydet (arka planda, toplu yazılır)"""
+    if not text.strip():
+        return
+    get_text_writer().write(text, detected_time, save_dir, prefix)
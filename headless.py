@@ -0,0 +1,110 @@
+#! ./venv/bin/python
+# -*- coding: utf-8 -*-
+# Author: @Hakan KILIÇASLAN - 2025
+# License: MIT
+
+"""Headless daemon: OCR/alarm/recording pipelines without a display.
+
+Usage: python -m camera_client --headless --config config.yaml
+       python headless.py --config config.yaml
+
+Nothing here imports tkinter or PIL.ImageTk. SIGTERM/SIGINT stop the
+cameras cleanly, SIGUSR1 logs the current status and the status is also
+written as JSON to `headless.status_file` every `headless.status_interval`
+seconds.
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+
+from core.alarm import read_alarm_words
+from core.config import Config
+from core.logs import setup_logging
+from core.manager import CameraManager
+
+
+class HeadlessDaemon:
+    def __init__(self, config):
+        self.config = config
+        self.stop_event = threading.Event()
+        self.started_at = time.time()
+        self.status_file = config.get('headless', 'status_file', default='logs/status.json')
+        self.status_interval = float(config.get('headless', 'status_interval', default=10))
+        alarm_words = read_alarm_words(config.config['alarm']['words_file'])
+        self.manager = CameraManager(config, alarm_words)
+        self.alarm_queue = self.manager.alarms.subscribe()
+
+    def handle_alarms(self):
+        """Consume alarm events until shutdown"""
+        while not self.stop_event.is_set():
+            try:
+                event = self.alarm_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            logging.warning(f"ALARM [{event.camera_id}] '{event.word}' in: {event.detection.text}")
+
+    def status(self):
+        return {
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started_at, 1),
+            **self.manager.stats()
+        }
+
+    def write_status(self):
+        if not self.status_file:
+            return
+        try:
+            tmp_file = f"{self.status_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.status(), f, indent=2, default=str)
+            os.replace(tmp_file, self.status_file)
+        except Exception as e:
+            logging.error(f"Failed to write status file: {str(e)}")
+
+    def request_stop(self, signum, frame):
+        logging.info(f"Received signal {signum}, shutting down")
+        self.stop_event.set()
+
+    def log_status(self, signum, frame):
+        logging.info(f"Status: {json.dumps(self.status(), default=str)}")
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, self.log_status)
+
+        self.manager.start()
+        alarm_thread = threading.Thread(target=self.handle_alarms, name="AlarmConsumer", daemon=True)
+        alarm_thread.start()
+        try:
+            while not self.stop_event.wait(self.status_interval):
+                self.write_status()
+        finally:
+            self.manager.stop()
+            self.write_status()
+        return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Camera OCR monitor without GUI")
+    parser.add_argument('--headless', action='store_true', help="accepted for camera_client.py compatibility")
+    parser.add_argument('--config', default='config.yaml', help="configuration file")
+    args = parser.parse_args(argv)
+
+    config = Config(args.config)
+    setup_logging(config)
+    logging.info("Headless mode starting...")
+    exit_code = HeadlessDaemon(config).run()
+    logging.info("Headless mode stopped")
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,176 @@
+import tkinter as tk
+from typing import Callable, Optional
+
+import cv2
+from PIL import Image, ImageTk
+
+
+class DisplayRenderer:
+    """Draws camera frames into a single canvas image item.
+
+    One PhotoImage is created per view and updated in place with paste();
+    a new one is only made when the displayed size changes. Frames are
+    scaled to fit the canvas (aspect kept) before the BGR->RGB conversion,
+    so only displayed pixels are converted. Repaints run from root.after at
+    most `fps` times a second and only the newest frame is drawn; nothing is
+    converted while the window is minimized or fully obscured.
+    """
+
+    def __init__(self, canvas: tk.Canvas, fps: float = 15):
+        self.canvas = canvas
+        self.interval = max(1, int(1000 / max(1, fps)))
+        self.photo = None
+        self.item = None
+        self.size = None
+        self.scale = 1.0  # frame pixels -> canvas pixels
+        self.pending = None
+        self.job = None
+        self.obscured = False
+        self.on_resize: Optional[Callable[[], None]] = None
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+        canvas.bind('<Visibility>', self._on_visibility, add='+')
+
+    def _on_visibility(self, event) -> None:
+        self.obscured = str(event.state) == 'VisibilityFullyObscured'
+
+    def visible(self) -> bool:
+        if self.obscured or not self.canvas.winfo_viewable():
+            return False
+        return self.canvas.winfo_toplevel().state() != 'iconic'
+
+    def show(self, frame) -> None:
+        """Hand over the newest frame; it is drawn on the next repaint"""
+        if self.pending is not None:
+            self.frames_skipped += 1
+        self.pending = frame
+
+    def start(self) -> None:
+        if self.job is None:
+            self.job = self.canvas.after(self.interval, self._repaint)
+
+    def stop(self) -> None:
+        if self.job is not None:
+            self.canvas.after_cancel(self.job)
+            self.job = None
+        self.pending = None
+
+    def _repaint(self) -> None:
+        self.job = self.canvas.after(self.interval, self._repaint)
+        frame, self.pending = self.pending, None
+        if frame is None:
+            return
+        if not self.visible():
+            self.frames_skipped += 1
+            return
+        self.draw(frame)
+
+    def draw(self, frame) -> None:
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width <= 1 or height <= 1:  # not mapped yet
+            width, height = int(self.canvas['width']), int(self.canvas['height'])
+
+        frame_h, frame_w = frame.shape[:2]
+        scale = min(width / frame_w, height / frame_h)
+        size = (max(1, int(frame_w * scale)), max(1, int(frame_h * scale)))
+        if size != (frame_w, frame_h):
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+        if self.photo is None or self.size != size:
+            self.photo = ImageTk.PhotoImage(image=image)
+            if self.item is None:
+                self.item = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+            else:
+                self.canvas.itemconfigure(self.item, image=self.photo)
+            # Overlays (ROI rectangles) stay above the video
+            self.canvas.tag_lower(self.item)
+            self.size = size
+            self.scale = scale
+            if self.on_resize:
+                self.on_resize()
+        else:
+            self.photo.paste(image)
+        self.frames_drawn += 1
+
+    def to_canvas(self, region):
+        """(x, y, w, h) in frame pixels -> canvas pixels"""
+        return tuple(int(round(v * self.scale)) for v in region)
+
+    def to_frame(self, region):
+        """(x, y, w, h) in canvas pixels -> frame pixels"""
+        return tuple(int(round(v / self.scale)) for v in region)
+
+
+class StreamView:
+    """Polls a FrameSource from the Tk event loop and feeds a DisplayRenderer.
+
+    on_frame(frame, captured_at) sees every frame the source delivers (OCR,
+    recording); the renderer only draws at its own rate. Replaces the
+    blocking `while True: ... root.update()` loops.
+    """
+
+    def __init__(self, root: tk.Misc, source, renderer: DisplayRenderer,
+                 on_frame: Optional[Callable] = None, max_frames: Optional[int] = None,
+                 on_stop: Optional[Callable[[], None]] = None, poll_interval: int = 10):
+        self.root = root
+        self.source = source
+        self.renderer = renderer
+        self.on_frame = on_frame
+        self.max_frames = max_frames
+        self.on_stop = on_stop
+        self.poll_interval = poll_interval
+        self.seq = 0
+        self.frames = 0
+        self.running = False
+        self.job = None
+
+    def start(self) -> 'StreamView':
+        self.running = True
+        self.renderer.start()
+        self._poll()
+        return self
+
+    def _poll(self) -> None:
+        self.job = None
+        if not self.running:
+            return
+        packet = self.source.read(self.seq, timeout=0)
+        if packet is None:
+            if not self.source.running:
+                self.stop()
+                return
+        else:
+            self.seq, frame, captured_at = packet
+            if frame is not None:
+                if self.on_frame:
+                    self.on_frame(frame, captured_at)
+                self.renderer.show(frame)
+                self.frames += 1
+                if self.max_frames and self.frames >= self.max_frames:
+                    self.stop()
+                    return
+        self.job = self.root.after(self.poll_interval, self._poll)
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.running = False
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+        self.source.stop()
+        if self.on_stop:
+            self.on_stop()
+
+
+_renderers = {}
+
+
+def get_renderer(canvas: tk.Canvas, fps: float = 15) -> DisplayRenderer:
+    """The renderer of a canvas, created on first use"""
+    key = str(canvas)
+    if key not in _renderers:
+        _renderers[key] = DisplayRenderer(canvas, fps)
+    return _renderers[key]